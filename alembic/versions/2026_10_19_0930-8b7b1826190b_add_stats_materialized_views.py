@@ -0,0 +1,101 @@
+"""add_stats_materialized_views
+
+Revision ID: 8b7b1826190b
+Revises: 788760af5c39
+Create Date: 2026-10-19 09:30:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b7b1826190b'
+down_revision = '788760af5c39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Each view needs a unique index so it can be refreshed CONCURRENTLY,
+    # which keeps reads available and never locks the base tables
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_user_stats AS
+        SELECT
+            1 AS id,
+            now() AS refreshed_at,
+            count(*) AS total_users,
+            count(*) FILTER (WHERE is_active) AS active_users,
+            count(*) FILTER (WHERE is_active IS NOT TRUE) AS inactive_users,
+            count(*) FILTER (WHERE is_admin) AS admin_users
+        FROM users
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_mv_user_stats_id ON mv_user_stats (id)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_college_branch_stats AS
+        SELECT
+            s.college_id,
+            c.name AS college_name,
+            COALESCE(s.branch, '') AS branch,
+            count(*) AS student_count
+        FROM students s
+        JOIN colleges c ON c.id = s.college_id
+        GROUP BY s.college_id, c.name, COALESCE(s.branch, '')
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_college_branch_stats_college_id_branch "
+        "ON mv_college_branch_stats (college_id, branch)"
+    )
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_event_registration_stats AS
+        SELECT
+            e.id AS event_id,
+            e.title,
+            e.start_time,
+            e.capacity,
+            count(r.id) AS registered_count,
+            CASE WHEN e.capacity > 0 THEN count(r.id)::float / e.capacity END AS fill_rate
+        FROM events e
+        LEFT JOIN registrations r ON r.event_id = e.id
+        GROUP BY e.id
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_event_registration_stats_event_id "
+        "ON mv_event_registration_stats (event_id)"
+    )
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_event_daily_fill AS
+        SELECT
+            daily.event_id,
+            daily.day,
+            daily.registrations,
+            daily.cumulative_registrations,
+            CASE WHEN e.capacity > 0 THEN daily.cumulative_registrations::float / e.capacity END AS fill_rate
+        FROM (
+            SELECT
+                r.event_id,
+                r.registered_at::date AS day,
+                count(*) AS registrations,
+                sum(count(*)) OVER (
+                    PARTITION BY r.event_id ORDER BY r.registered_at::date
+                )::bigint AS cumulative_registrations
+            FROM registrations r
+            WHERE r.registered_at IS NOT NULL
+            GROUP BY r.event_id, r.registered_at::date
+        ) daily
+        JOIN events e ON e.id = daily.event_id
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_event_daily_fill_event_id_day "
+        "ON mv_event_daily_fill (event_id, day)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_event_daily_fill")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_event_registration_stats")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_college_branch_stats")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_user_stats")
@@ -0,0 +1,76 @@
+"""add_event_sync_versions_and_tombstones
+
+Revision ID: 5d3f0c2e9a71
+Revises: b308213cb81b
+Create Date: 2026-10-19 10:30:08.552310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d3f0c2e9a71'
+down_revision = 'b308213cb81b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('events', sa.Column('sync_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.execute("UPDATE events SET updated_at = created_at")
+    op.create_index('ix_events_sync_version_id', 'events', ['sync_version', 'id'], unique=False)
+
+    op.create_table('event_tombstones',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('sync_version', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index('ix_event_tombstones_sync_version_event_id', 'event_tombstones', ['sync_version', 'event_id'], unique=False)
+
+    # Versions are the writing transaction's ID, so everything below the
+    # oldest running transaction (the snapshot xmin) is committed and final;
+    # triggers also cover writes that bypass the ORM
+    op.execute("""
+        CREATE FUNCTION events_set_sync_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.sync_version := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER events_set_sync_version
+        BEFORE INSERT OR UPDATE ON events
+        FOR EACH ROW EXECUTE FUNCTION events_set_sync_version()
+    """)
+
+    op.execute("""
+        CREATE FUNCTION events_write_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO event_tombstones (event_id, sync_version, deleted_at)
+            VALUES (OLD.id, pg_current_xact_id()::text::bigint, now() AT TIME ZONE 'utc')
+            ON CONFLICT (event_id) DO UPDATE SET sync_version = EXCLUDED.sync_version;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER events_write_tombstone
+        AFTER DELETE ON events
+        FOR EACH ROW EXECUTE FUNCTION events_write_tombstone()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS events_write_tombstone ON events")
+    op.execute("DROP FUNCTION IF EXISTS events_write_tombstone()")
+    op.execute("DROP TRIGGER IF EXISTS events_set_sync_version ON events")
+    op.execute("DROP FUNCTION IF EXISTS events_set_sync_version()")
+    op.drop_index('ix_event_tombstones_sync_version_event_id', table_name='event_tombstones')
+    op.drop_table('event_tombstones')
+    op.drop_index('ix_events_sync_version_id', table_name='events')
+    op.drop_column('events', 'sync_version')
+    op.drop_column('events', 'updated_at')
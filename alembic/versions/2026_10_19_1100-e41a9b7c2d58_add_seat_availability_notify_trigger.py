@@ -0,0 +1,53 @@
+"""add_seat_availability_notify_trigger
+
+Revision ID: e41a9b7c2d58
+Revises: 5d3f0c2e9a71
+Create Date: 2026-10-19 11:00:44.107925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41a9b7c2d58'
+down_revision = '5d3f0c2e9a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Notifications are delivered on commit, and identical payloads within a
+    # transaction are sent once, so a batch touching an event notifies once
+    op.execute("""
+        CREATE FUNCTION notify_seat_availability() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'events' THEN
+                PERFORM pg_notify('seat_availability', NEW.id::text);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('seat_availability', OLD.event_id::text);
+            ELSE
+                PERFORM pg_notify('seat_availability', NEW.event_id::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER registrations_notify_availability
+        AFTER INSERT OR DELETE ON registrations
+        FOR EACH ROW EXECUTE FUNCTION notify_seat_availability()
+    """)
+    # Capacity changes alter availability too
+    op.execute("""
+        CREATE TRIGGER events_notify_availability
+        AFTER UPDATE OF capacity ON events
+        FOR EACH ROW WHEN (OLD.capacity IS DISTINCT FROM NEW.capacity)
+        EXECUTE FUNCTION notify_seat_availability()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS events_notify_availability ON events")
+    op.execute("DROP TRIGGER IF EXISTS registrations_notify_availability ON registrations")
+    op.execute("DROP FUNCTION IF EXISTS notify_seat_availability()")
@@ -0,0 +1,46 @@
+"""add_venue_overlap_exclusion_constraint
+
+Revision ID: c7b19e3d0f52
+Revises: 3a8d5e1f6c24
+Create Date: 2026-10-19 12:30:52.017436
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b19e3d0f52'
+down_revision = '3a8d5e1f6c24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lets a GiST index combine plain equality (venue) with range overlap
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.add_column('events', sa.Column(
+        'during',
+        postgresql.TSRANGE(),
+        sa.Computed(
+            "CASE WHEN end_time IS NULL THEN tsrange(start_time, start_time, '[]') "
+            "ELSE tsrange(start_time, end_time, '[)') END",
+            persisted=True
+        ),
+        nullable=True
+    ))
+
+    # Fails if existing events already double-book a venue; find them with
+    # SELECT a.id, b.id FROM events a JOIN events b ON a.id < b.id
+    #   AND lower(a.venue) = lower(b.venue) AND a.during && b.during
+    op.execute(
+        "ALTER TABLE events ADD CONSTRAINT ex_events_venue_during "
+        "EXCLUDE USING gist (lower(venue) WITH =, during WITH &&)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE events DROP CONSTRAINT ex_events_venue_during")
+    op.drop_column('events', 'during')
@@ -0,0 +1,44 @@
+"""add_registration_lookup_indexes
+
+Revision ID: 4f1c8a2d7e93
+Revises: c7b19e3d0f52
+Create Date: 2026-10-19 13:00:42.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c8a2d7e93'
+down_revision = 'c7b19e3d0f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so registrations keep being written during the build;
+    # CONCURRENTLY cannot run inside the migration's transaction
+    with op.get_context().autocommit_block():
+        # Every event read counts registrations by event_id, and per-user lookups
+        # filter by user_id (and event_id); both were sequential scans
+        op.create_index(
+            'ix_registrations_event_id', 'registrations', ['event_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_registrations_user_id_event_id', 'registrations', ['user_id', 'event_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        # Matches the ORDER BY of GET /stats/events so a page is read off the index
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_mv_event_registration_stats_fill_rate "
+            "ON mv_event_registration_stats (fill_rate DESC NULLS LAST, registered_count DESC, event_id)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_mv_event_registration_stats_fill_rate")
+        op.drop_index('ix_registrations_user_id_event_id', table_name='registrations', postgresql_concurrently=True)
+        op.drop_index('ix_registrations_event_id', table_name='registrations', postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""add_registrations_user_event_unique
+
+Revision ID: 6b8e3f1d9a24
+Revises: 9d2e6b4a1f08
+Create Date: 2026-10-19 14:00:08.915237
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b8e3f1d9a24'
+down_revision = '9d2e6b4a1f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Duplicates left by waitlist promotions of users who had registered
+    # directly: keep the checked-in row, else the oldest
+    op.execute(
+        "DELETE FROM registrations r USING ("
+        "  SELECT id, row_number() OVER ("
+        "    PARTITION BY user_id, event_id"
+        "    ORDER BY EXISTS (SELECT 1 FROM checkins c WHERE c.registration_id = registrations.id) DESC, id"
+        "  ) AS rank"
+        "  FROM registrations"
+        "  WHERE (user_id, event_id) IN ("
+        "    SELECT user_id, event_id FROM registrations GROUP BY user_id, event_id HAVING count(*) > 1"
+        "  )"
+        ") duplicates "
+        "WHERE r.id = duplicates.id AND duplicates.rank > 1"
+    )
+    op.execute(
+        "DELETE FROM waitlist_entries w USING registrations r "
+        "WHERE r.user_id = w.user_id AND r.event_id = w.event_id"
+    )
+
+    # Build the index without blocking registrations, then attach it as the
+    # constraint; it replaces the plain (user_id, event_id) lookup index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_registrations_user_id_event_id', 'registrations', ['user_id', 'event_id'],
+            unique=True, postgresql_concurrently=True
+        )
+        op.execute(
+            "ALTER TABLE registrations ADD CONSTRAINT uq_registrations_user_id_event_id "
+            "UNIQUE USING INDEX uq_registrations_user_id_event_id"
+        )
+        op.drop_index('ix_registrations_user_id_event_id', table_name='registrations', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_registrations_user_id_event_id', 'registrations', ['user_id', 'event_id'],
+            unique=False, postgresql_concurrently=True
+        )
+    op.drop_constraint('uq_registrations_user_id_event_id', 'registrations', type_='unique')
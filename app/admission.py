@@ -0,0 +1,253 @@
+"""
+In-memory admission control for hot event registration launches.
+
+Every event gets a gate that lets a bounded number of registration requests
+run at once. Callers beyond that limit are queued with a signed ticket and
+answered straight from memory, so a flash crowd cannot drain the database
+pool for the rest of the API. Gates live in the worker process: with several
+workers each one enforces its own limit and keeps its own queue.
+
+Gates are keyed by the registration route's path, so a request is gated
+before anything is looked up: an event's gate by its ID, and a series
+occurrence's by (series_id, occurrence_start), as its event may not even
+exist yet.
+"""
+import hashlib
+import hmac
+import itertools
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from fastapi import Header, HTTPException, Request, status
+
+from app.config import settings
+
+# Tickets are only honoured by the worker that issued them
+_instance_key = secrets.token_bytes(16)
+_event_limits = settings.admission_event_limits
+
+# Gates restart numbering at 0 when recreated, so each one signs its tickets
+# with its own epoch and never honours a ticket from an earlier gate
+_epochs = itertools.count()
+
+GateKey = Union[int, Tuple[int, str]]
+
+_prefix = re.escape(settings.API_V1_PREFIX)
+_event_registration_path = re.compile(_prefix + r"/registrations/events/(\d+)/register")
+_occurrence_registration_path = re.compile(_prefix + r"/series/(\d+)/occurrences/([^/]+)/register")
+
+
+class AdmissionGate:
+    """
+    Bounded in-flight counter with a FIFO ticket queue.
+
+    Tickets are numbered in issue order. `now_serving` marks the first ticket
+    that has not been invited in yet; every freed slot invites one more. If
+    invited callers do not come back within the grace period, the gate
+    invites the next batch so abandoned tickets cannot stall the queue.
+    """
+
+    def __init__(self, max_in_flight: int, grace_seconds: float):
+        self.max_in_flight = max_in_flight
+        self.grace_seconds = grace_seconds
+        self.epoch = next(_epochs)
+        self.in_flight = 0
+        self.next_ticket = 0
+        self.now_serving = 0
+        self.last_advanced = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_enter(self, ticket: Optional[int] = None) -> Optional[int]:
+        """
+        Admit a request, or return the ticket it has to present on retry
+        """
+        with self._lock:
+            self._advance_stalled()
+            has_slot = self.in_flight < self.max_in_flight
+
+            if ticket is not None and ticket < self.next_ticket:
+                if ticket < self.now_serving and has_slot:
+                    self.in_flight += 1
+                    return None
+                return ticket
+
+            # New arrivals only skip the queue when nobody is waiting
+            if self.now_serving >= self.next_ticket and has_slot:
+                self.in_flight += 1
+                return None
+
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            return ticket
+
+    def leave(self) -> None:
+        """
+        Release an admitted request's slot and invite the next ticket
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self._advance(1)
+
+    def position(self, ticket: int) -> int:
+        """
+        1-based queue position of a ticket (1 means next in line)
+        """
+        return max(ticket - self.now_serving, 0) + 1
+
+    @property
+    def idle(self) -> bool:
+        return self.in_flight == 0 and self.now_serving >= self.next_ticket
+
+    def _advance(self, count: int) -> None:
+        self.now_serving = min(self.now_serving + count, self.next_ticket)
+        self.last_advanced = time.monotonic()
+
+    def _advance_stalled(self) -> None:
+        free_slots = self.max_in_flight - self.in_flight
+        if (
+            free_slots > 0
+            and self.now_serving < self.next_ticket
+            and time.monotonic() - self.last_advanced > self.grace_seconds
+        ):
+            self._advance(free_slots)
+
+
+_gates: Dict[GateKey, AdmissionGate] = {}
+_gates_lock = threading.Lock()
+
+# Gate whose slot the current request already holds from a middleware
+_held: ContextVar[Optional[GateKey]] = ContextVar("admission_held", default=None)
+
+
+def gate_key(path: str) -> Optional[GateKey]:
+    """
+    Gate a registration route's path belongs to, or None for other paths
+    """
+    match = _event_registration_path.fullmatch(path)
+    if match:
+        return int(match[1])
+    match = _occurrence_registration_path.fullmatch(path)
+    if match:
+        return int(match[1]), match[2]
+    return None
+
+
+def get_gate(key: GateKey) -> Optional[AdmissionGate]:
+    """
+    Return the gate for an event or occurrence, or None when admission
+    control is off for it
+    """
+    limit = _event_limits.get(key, settings.ADMISSION_MAX_IN_FLIGHT)
+    if not settings.ADMISSION_ENABLED or limit <= 0:
+        return None
+
+    with _gates_lock:
+        gate = _gates.get(key)
+        if gate is None:
+            gate = AdmissionGate(limit, settings.ADMISSION_GRACE_SECONDS)
+            _gates[key] = gate
+        return gate
+
+
+def _discard_if_idle(key: GateKey, gate: AdmissionGate) -> None:
+    with _gates_lock:
+        if gate.idle and _gates.get(key) is gate:
+            del _gates[key]
+
+
+def _sign(key: GateKey, epoch: int, ticket: int) -> str:
+    message = f"{key}:{epoch}:{ticket}".encode("utf-8")
+    return hmac.new(_instance_key, message, hashlib.sha256).hexdigest()[:16]
+
+
+def encode_ticket(key: GateKey, gate: AdmissionGate, ticket: int) -> str:
+    return f"{ticket}.{_sign(key, gate.epoch, ticket)}"
+
+
+def decode_ticket(key: GateKey, gate: AdmissionGate, token: Optional[str]) -> Optional[int]:
+    """
+    Return the ticket number from a token, or None if it is missing, forged
+    or was issued by an earlier gate for the same key
+    """
+    if not token:
+        return None
+    try:
+        ticket_part, signature = token.split(".", 1)
+        ticket = int(ticket_part)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _sign(key, gate.epoch, ticket)):
+        return None
+    return ticket
+
+
+@contextmanager
+def admission_slot(key: GateKey, ticket_token: Optional[str]) -> Iterator[None]:
+    """
+    Hold a gate slot for a registration, or raise 429 with the caller's
+    ticket and queue position
+    """
+    gate = get_gate(key)
+    if gate is None:
+        yield
+        return
+
+    ticket = gate.try_enter(decode_ticket(key, gate, ticket_token))
+    if ticket is not None:
+        token = encode_ticket(key, gate, ticket)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "message": "Registration is busy, you are in the queue",
+                "ticket": token,
+                "position": gate.position(ticket),
+            },
+            headers={
+                "Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS),
+                "X-Admission-Ticket": token,
+            },
+        )
+
+    try:
+        yield
+    finally:
+        gate.leave()
+        _discard_if_idle(key, gate)
+
+
+@contextmanager
+def hold_admission(key: GateKey, ticket_token: Optional[str]) -> Iterator[None]:
+    """
+    Take a request's gate slot ahead of its route, for middleware that must
+    not reach the database for rejected callers; the route's
+    admit_registration then runs in that slot instead of taking another
+    """
+    with admission_slot(key, ticket_token):
+        held = _held.set(key)
+        try:
+            yield
+        finally:
+            _held.reset(held)
+
+
+async def admit_registration(
+    request: Request,
+    x_admission_ticket: Optional[str] = Header(None)
+):
+    """
+    Dependency that holds a gate slot for the duration of a registration.
+
+    Declare it before any database dependency, including get_current_user,
+    so rejected callers never check out a connection.
+    """
+    key = gate_key(request.scope["path"])
+    if key is None or _held.get() == key:
+        yield
+        return
+    with admission_slot(key, x_admission_ticket):
+        yield
@@ -0,0 +1,203 @@
+"""
+Live seat availability pushed to subscribers.
+
+Triggers on registrations (and on event capacity changes) send the event ID
+on the `seat_availability` channel when a write commits. Each worker runs one
+listener thread on a dedicated connection outside the pool, which only marks
+events dirty. A flusher task wakes every AVAILABILITY_FLUSH_INTERVAL_MS,
+reloads counts for dirty events that have subscribers in one query, and fans
+changed values out to in-process subscriber queues. A burst of registrations
+therefore costs one query and at most one update per event per interval.
+"""
+import asyncio
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.config import settings
+from app.database import ReadSessionLocal, engine
+from app.models import Event
+from app.schemas import EventAvailability
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "seat_availability"
+
+# Updates a slow subscriber may fall behind before it starts missing them
+SUBSCRIBER_QUEUE_SIZE = 100
+LISTEN_POLL_SECONDS = 5.0
+RECONNECT_DELAY_SECONDS = 2.0
+
+
+def load_availability(event_ids: Iterable[int]) -> Dict[int, EventAvailability]:
+    """
+    Current seat availability for the given events, in one query
+    """
+    db = ReadSessionLocal()
+    try:
+        rows = db.query(Event.id, Event.capacity, Event.registered_count).filter(
+            Event.id.in_(list(event_ids))
+        ).all()
+    finally:
+        db.close()
+
+    return {
+        row.id: EventAvailability(
+            event_id=row.id,
+            capacity=row.capacity,
+            registered_count=row.registered_count,
+            is_full=row.capacity is not None and row.registered_count >= row.capacity
+        )
+        for row in rows
+    }
+
+
+class AvailabilityHub:
+    """
+    Fans coalesced availability changes out to subscribers in this worker
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._last_sent: Dict[int, EventAvailability] = {}
+        self._dirty: Set[int] = set()
+        self._dirty_lock = threading.Lock()
+        self._resync = threading.Event()
+        self._stopping = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, event_ids: List[int]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        for event_id in event_ids:
+            self._subscribers[event_id].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, event_ids: List[int]) -> None:
+        for event_id in event_ids:
+            queues = self._subscribers.get(event_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[event_id]
+                self._last_sent.pop(event_id, None)
+
+    def mark_dirty(self, event_ids: Iterable[int]) -> None:
+        with self._dirty_lock:
+            self._dirty.update(event_ids)
+
+    def start(self) -> None:
+        """
+        Start the listener thread and the flusher (call from the event loop)
+        """
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="availability-listener", daemon=True)
+        self._listener.start()
+        self._flusher = asyncio.create_task(self._flush_periodically(), name="availability-flusher")
+
+    async def stop(self) -> None:
+        """
+        Stop background work and end every open stream
+        """
+        self._stopping.set()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        self.end_streams()
+        if self._listener is not None:
+            await run_in_threadpool(self._listener.join, LISTEN_POLL_SECONDS + 1)
+
+    def end_streams(self) -> None:
+        """
+        Tell every open stream to finish; clients reconnect elsewhere
+        """
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._offer(queue, None)
+
+    async def _flush_periodically(self) -> None:
+        interval = settings.AVAILABILITY_FLUSH_INTERVAL_MS / 1000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception("Seat availability flush failed")
+                metrics.increment("availability_flush_failures_total")
+
+    async def _flush(self) -> None:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if self._resync.is_set():
+            self._resync.clear()
+            dirty.update(self._subscribers)
+
+        # Only events someone is watching are reloaded
+        watched = [event_id for event_id in dirty if event_id in self._subscribers]
+        if not watched:
+            return
+
+        current = await run_in_threadpool(load_availability, watched)
+        for event_id, availability in current.items():
+            if self._last_sent.get(event_id) == availability:
+                continue
+            self._last_sent[event_id] = availability
+            for queue in list(self._subscribers.get(event_id, ())):
+                self._offer(queue, availability)
+            metrics.increment("availability_updates_sent_total")
+
+    def _offer(self, queue: asyncio.Queue, update: Optional[EventAvailability]) -> None:
+        try:
+            queue.put_nowait(update)
+        except asyncio.QueueFull:
+            metrics.increment("availability_updates_dropped_total")
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception("Seat availability listener disconnected")
+                metrics.increment("availability_listener_reconnects_total")
+                self._stopping.wait(RECONNECT_DELAY_SECONDS)
+
+    def _listen_once(self) -> None:
+        # A dedicated connection, so the listener never holds a pool slot
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.connect(*cargs, **cparams)
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+            # Changes may have been missed while disconnected
+            self._resync.set()
+
+            while not self._stopping.is_set():
+                readable, _, _ = select.select([connection], [], [], LISTEN_POLL_SECONDS)
+                if not readable:
+                    continue
+                connection.poll()
+                event_ids = []
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    if notify.payload.isdigit():
+                        event_ids.append(int(notify.payload))
+                self.mark_dirty(event_ids)
+        finally:
+            connection.close()
+
+
+hub = AvailabilityHub()
+
+metrics.register_gauge("availability_subscribers", lambda: hub.subscriber_count)
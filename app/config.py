@@ -1,29 +1,165 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
-    print("Loading configuration settings...")
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 5000  # 0 disables
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 10000  # 0 disables
+    # Per-route overrides keyed by endpoint function name, e.g. "get_event_registrations:2000"
+    DB_ROUTE_STATEMENT_TIMEOUTS: str = ""
+    # Connections all workers of `python -m app.server` may hold together; 0 keeps
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW per worker
+    DB_CONNECTION_BUDGET: int = 0
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 480
     
+    # Check-in tickets (Ed25519); derived from SECRET_KEY when unset
+    TICKET_SIGNING_KEY: Optional[str] = None  # base64url 32-byte seed
+    CHECKIN_SYNC_MAX_SCANS: int = 5000
+    
     # API
     API_V1_PREFIX: str = "/api"
     PROJECT_NAME: str = "Event Manager API"
     DEBUG: bool = False
     
+    # Production server (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 starts one worker per CPU core
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30  # how long in-flight requests may finish on shutdown
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:3001"
     
+    # Registration admission control (limits are per event, per worker process)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 20
+    ADMISSION_EVENT_LIMITS: str = ""  # e.g. "12:50,15:5"; 0 disables the gate for an event
+    ADMISSION_GRACE_SECONDS: float = 5.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    
+    # Admin statistics (materialized views refreshed in the background)
+    STATS_REFRESH_INTERVAL_SECONDS: int = 60  # 0 disables the scheduled refresh
+    STATS_REFRESH_TIMEOUT_MS: int = 300000
+    
+    # Trending events (ranked from hourly registration counters)
+    TRENDING_WINDOW_HOURS: int = 24
+    TRENDING_HALF_LIFE_HOURS: float = 6.0
+    TRENDING_SIZE: int = 50
+    TRENDING_RECOMPUTE_INTERVAL_SECONDS: int = 60  # 0 disables the scheduled recompute
+    
+    # Recurring event series
+    SERIES_MAX_WINDOW_DAYS: int = 366
+    SERIES_MAX_OCCURRENCES: int = 1000
+    
+    # Live seat availability streams
+    AVAILABILITY_STREAM_ENABLED: bool = True
+    AVAILABILITY_FLUSH_INTERVAL_MS: int = 250
+    AVAILABILITY_HEARTBEAT_SECONDS: int = 15
+    AVAILABILITY_MAX_EVENTS_PER_STREAM: int = 50
+    
+    # Single-flight coalescing of identical concurrent GETs
+    SINGLE_FLIGHT_ENABLED: bool = True
+    # Path patterns under API_V1_PREFIX; only routes whose response is the same for every caller of a role
+    SINGLE_FLIGHT_ROUTES: str = r"/events,/events/\d+,/events/trending,/colleges,/colleges/\d+"
+    
+    # Idempotency-Key support for POSTs that must not run twice
+    IDEMPOTENCY_ENABLED: bool = True
+    # Path patterns under API_V1_PREFIX
+    IDEMPOTENCY_ROUTES: str = r"/registrations/events/\d+/register,/auth/signup,/events"
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # how long a retry waits for the first request before a 409
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # after this an unfinished claim is taken over
+    IDEMPOTENCY_PRUNE_INTERVAL_SECONDS: int = 3600  # 0 disables the scheduled prune
+    
+    # Load shedding
+    LOAD_SHEDDING_ENABLED: bool = True
+    LOAD_SHED_POOL_WAIT_MS: float = 200.0
+    LOAD_SHED_THREADPOOL_OCCUPANCY: float = 0.9
+    # Pressure at which each priority class is shed; classes not listed are never shed
+    LOAD_SHED_LEVELS: str = "admin:1.0,listings:1.5,registrations:2.0"
+    LOAD_SHED_RETRY_AFTER_SECONDS: int = 2
+    
+    # Event-loop stall detection
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_STALL_THRESHOLD_MS: int = 100
+    LOOP_MONITOR_FAIL_ON_BLOCKING: bool = False  # for tests: requests that blocked the loop raise
+    
+    # Request profiling (admins send X-Profile: 1 or ?profile=1)
+    PROFILING_ENABLED: bool = True
+    PROFILE_SAMPLE_RATE: float = 0.0  # fraction of all requests profiled, one at a time
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_SECONDS: float = 30.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_STORED: int = 100
+    
+    # Startup warm-up (/ready reports 503 until it finishes)
+    WARMUP_ENABLED: bool = True
+    WARMUP_POOL_CONNECTIONS: int = 5  # capped at DB_POOL_SIZE
+    # GETs under API_V1_PREFIX sent in-process as the first active admin
+    WARMUP_PATHS: str = "/events?limit=1,/events/trending,/colleges,/series,/registrations/my-registrations,/stats/events?limit=1"
+    
+    # Logging (written to stdout by a background thread)
+    LOG_LEVEL: str = "INFO"  # for the app.* loggers; other libraries log warnings and up
+    LOG_FORMAT: str = "json"  # or "text"
+    LOG_QUEUE_SIZE: int = 10000  # records arriving while the queue is full are dropped
+    LOG_ACCESS_ENABLED: bool = True
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0  # fraction of successful requests logged; errors always are
+    LOG_SLOW_REQUEST_MS: float = 1000.0  # requests this slow are always logged
+    
     @property
     def allowed_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
     
+    @property
+    def admission_event_limits(self) -> Dict[int, int]:
+        limits = {}
+        for item in self.ADMISSION_EVENT_LIMITS.split(","):
+            if item.strip():
+                event_id, limit = item.split(":")
+                limits[int(event_id)] = int(limit)
+        return limits
+    
+    @property
+    def route_statement_timeouts(self) -> Dict[str, int]:
+        timeouts = {}
+        for item in self.DB_ROUTE_STATEMENT_TIMEOUTS.split(","):
+            if item.strip():
+                route, timeout_ms = item.split(":")
+                timeouts[route.strip()] = int(timeout_ms)
+        return timeouts
+    
+    @property
+    def load_shed_levels(self) -> Dict[str, float]:
+        levels = {}
+        for item in self.LOAD_SHED_LEVELS.split(","):
+            if item.strip():
+                priority, level = item.split(":")
+                levels[priority.strip()] = float(level)
+        return levels
+    
+    @property
+    def single_flight_routes(self) -> List[str]:
+        return [route.strip() for route in self.SINGLE_FLIGHT_ROUTES.split(",") if route.strip()]
+    
+    @property
+    def idempotency_routes(self) -> List[str]:
+        return [route.strip() for route in self.IDEMPOTENCY_ROUTES.split(",") if route.strip()]
+    
+    @property
+    def warmup_paths(self) -> List[str]:
+        return [path.strip() for path in self.WARMUP_PATHS.split(",") if path.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
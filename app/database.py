@@ -1,26 +1,144 @@
-from sqlalchemy import create_engine
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from app import logs, metrics
 from app.config import settings
+from app.load_shedding import pool_monitor
+
+
+class MonitoredQueuePool(QueuePool):
+    """
+    QueuePool that reports connection checkout waits to the load shedder
+    """
+
+    def _do_get(self):
+        pool_monitor.checkout_started()
+        try:
+            return super()._do_get()
+        finally:
+            pool_monitor.checkout_finished()
+
 
 # Create database engine
-print(settings.DATABASE_URL)
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
+    poolclass=MonitoredQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        # Server-side defaults for every pooled connection
+        "options": (
+            f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS} "
+            f"-c idle_in_transaction_session_timeout={settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}"
+        )
+    }
 )
+metrics.register_gauge("db_pool_checked_out", engine.pool.checkedout)
+event.listen(engine, "before_cursor_execute", logs.count_query)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessions for pure read routes: autocommit skips the BEGIN/ROLLBACK round
+# trips, and objects stay readable after the session releases its connection
+ReadSessionLocal = sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine.execution_options(isolation_level="AUTOCOMMIT")
+)
+
+# Postgres error codes surfaced by the timeouts above
+QUERY_CANCELED = "57014"
+IDLE_IN_TRANSACTION_SESSION_TIMEOUT = "25P03"
+# Raised by exclusion constraints such as the venue overlap check
+EXCLUSION_VIOLATION = "23P01"
+
+_route_statement_timeouts = settings.route_statement_timeouts
+
+
+@event.listens_for(SessionLocal, "after_begin")
+@event.listens_for(ReadSessionLocal, "after_begin")
+def apply_statement_timeout(session, transaction, connection):
+    """
+    Apply a per-route statement timeout to each transaction the session opens
+    """
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms is None:
+        return
+
+    if connection.get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+        # No transaction to scope SET LOCAL to; undone when the connection is checked in
+        connection.exec_driver_sql(f"SET statement_timeout = {int(timeout_ms)}")
+        connection.info["reset_statement_timeout"] = True
+    else:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+@event.listens_for(engine, "checkin")
+def reset_statement_timeout(dbapi_connection, connection_record):
+    """
+    Restore the connection default after a session-level timeout override
+    """
+    if dbapi_connection is None or not connection_record.info.pop("reset_statement_timeout", False):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("RESET statement_timeout")
+    cursor.close()
+    if not dbapi_connection.autocommit:
+        dbapi_connection.commit()
+
+
+def pgcode(exc: DBAPIError) -> Optional[str]:
+    """
+    Postgres SQLSTATE of a wrapped DBAPI error, if any
+    """
+    return getattr(exc.orig, "pgcode", None)
+
+
+def route_name(request: Request) -> str:
+    """
+    Name of the endpoint function a request was routed to
+    """
+    endpoint = request.scope.get("endpoint")
+    return getattr(endpoint, "__name__", "unknown")
+
 # Create Base class for models
 Base = declarative_base()
 
 
+def _open_session(factory: sessionmaker, request: Request) -> Session:
+    db = factory()
+    timeout_ms = _route_statement_timeouts.get(route_name(request))
+    if timeout_ms is not None:
+        db.info["statement_timeout_ms"] = timeout_ms
+    return db
+
+
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
+# Sessions check out a connection on their first query only, so requests
+# rejected before querying (e.g. by JWT validation) never touch the pool.
+def get_db(request: Request):
+    db = _open_session(SessionLocal, request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency to get a read-only database session
+# Routes should call db.close() once their results are loaded: the connection
+# goes back to the pool before the response is serialized, and the session
+# can still be reused (it checks out a fresh connection on the next query).
+def get_read_db(request: Request):
+    db = _open_session(ReadSessionLocal, request)
     try:
         yield db
     finally:
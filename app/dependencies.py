@@ -5,9 +5,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app import logs
 from app.config import settings
-from app.database import get_db
+from app.database import get_read_db
 from app.models import User
+from app.queries import get_user_by_id
 from app.schemas import TokenData
 
 # OAuth2 scheme for token authentication
@@ -56,16 +58,20 @@ def verify_token(token: str) -> TokenData:
         raise credentials_exception
 
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> User:
     """
-    Get the current authenticated user
+    Get the current authenticated user.
+    The lookup runs on the read session, which is released straight away so
+    write routes never hold two pooled connections at once. Declared sync so
+    FastAPI runs the query in the threadpool instead of on the event loop.
     """
     token_data = verify_token(token)
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = get_user_by_id(db, token_data.user_id)
+    db.close()
     
     if user is None:
         raise HTTPException(
@@ -73,6 +79,7 @@ async def get_current_user(
             detail="User not found"
         )
     
+    logs.set_user(user.id)
     return user
 
 
@@ -80,7 +87,8 @@ async def get_current_admin_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
     """
-    Verify that the current user is an admin
+    Verify that the current user is an admin.
+    Does no I/O, so it stays async and skips a threadpool hop.
     """
     if not current_user.is_admin:
         raise HTTPException(
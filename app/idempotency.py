@@ -0,0 +1,346 @@
+"""
+Idempotency-Key support for POSTs that must not run twice.
+
+A client that sends `Idempotency-Key: <unique value>` to one of the
+IDEMPOTENCY_ROUTES can retry the request safely. The first request claims the
+key in the idempotency_keys table and runs normally; its response is stored
+and every retry with the same key is answered from it, with
+`Idempotent-Replayed: true`, without running the route again. Keys are scoped
+to the caller: "user:<id>" from the verified JWT. Requests without a token
+(signup) are scoped to "anonymous:<request fingerprint>", so only a retry of
+the identical request replays its response.
+
+Registrations go through their admission gate before the key is claimed, so
+callers turned away with 429 during a launch never reach the database.
+
+- A retry that arrives while the first request is still running waits for it
+  (up to IDEMPOTENCY_WAIT_SECONDS, then 409). Requests in the same worker wait
+  on the first one directly; across workers they poll the stored row.
+- Reusing a key for a different request (method, path, query or body) is
+  rejected with 422 (for authenticated callers).
+- 5xx and 429 responses are not stored, so the retry runs the route again.
+- A claim whose request never finished (its worker died) is taken over after
+  IDEMPOTENCY_LOCK_SECONDS.
+- Stored responses expire after IDEMPOTENCY_TTL_HOURS and are pruned by a
+  background job.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple, Union
+
+import anyio.to_thread
+from fastapi import HTTPException
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app import admission, metrics
+from app.config import settings
+from app.database import SessionLocal
+from app.dependencies import verify_token
+from app.models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.1
+
+# Responses that say nothing final about the request, so a retry runs it again
+_UNSTORED_STATUSES = {429}
+
+Scope = Tuple[str, str]
+
+_in_flight: Dict[Scope, "asyncio.Future[None]"] = {}
+
+
+def request_owner(headers: List[Tuple[bytes, bytes]], request_fingerprint: str) -> Optional[str]:
+    """
+    Owner a key is scoped to, or None if the request's token does not verify.
+    Unauthenticated keys are scoped to the request itself, so unrelated
+    clients that pick the same key never see each other's responses.
+    """
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                token_data = verify_token(token)
+            except HTTPException:
+                return None
+            return f"user:{token_data.user_id}"
+    return f"anonymous:{request_fingerprint[:32]}"
+
+
+def fingerprint(scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def claim(owner: str, key: str, request_fingerprint: str) -> Optional[IdempotencyKey]:
+    """
+    Claim a key for this request. Returns None if it is now ours to run, else
+    the stored record of the request that holds it.
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        claimed = db.execute(
+            insert(IdempotencyKey)
+            .values(owner=owner, key=key, fingerprint=request_fingerprint, created_at=now, locked_at=now)
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_owner_key")
+            .returning(IdempotencyKey.id)
+        ).first()
+        if claimed is None:
+            # Take over a claim whose request never finished
+            claimed = db.execute(
+                update(IdempotencyKey)
+                .where(and_(
+                    IdempotencyKey.owner == owner,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.fingerprint == request_fingerprint,
+                    IdempotencyKey.status_code.is_(None),
+                    IdempotencyKey.locked_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                ))
+                .values(locked_at=now)
+                .returning(IdempotencyKey.id)
+            ).first()
+        db.commit()
+        if claimed is not None:
+            return None
+
+        record = db.execute(
+            select(IdempotencyKey).where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+        ).scalars().first()
+        return record
+    finally:
+        db.close()
+
+
+def store(owner: str, key: str, status_code: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+            .values(
+                status_code=status_code,
+                response_headers=json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers]),
+                response_body=body,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def release(owner: str, key: str) -> None:
+    """
+    Drop an unfinished claim so the next retry runs the request
+    """
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.owner == owner,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def prune_expired() -> None:
+    """
+    Delete stored responses older than IDEMPOTENCY_TTL_HOURS
+    """
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def receive_once(body: bytes):
+    """
+    ASGI receive that hands the app a body that was already read
+    """
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            await asyncio.Event().wait()  # Never disconnects
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
+
+
+async def send_json(send, status_code: int, detail: Union[str, dict], headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def replay(send, record: IdempotencyKey) -> None:
+    headers = [
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in json.loads(record.response_headers)
+        if name.lower() != "content-length"
+    ]
+    body = record.response_body or b""
+    headers += [(b"content-length", str(len(body)).encode()), (b"idempotent-replayed", b"true")]
+    await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """
+    Runs a POST at most once per Idempotency-Key and replays its response
+    """
+
+    def __init__(self, app):
+        self.app = app
+        prefix = re.escape(settings.API_V1_PREFIX)
+        self.routes = [re.compile(prefix + pattern) for pattern in settings.idempotency_routes]
+
+    async def __call__(self, scope, receive, send):
+        key = None
+        if scope["type"] == "http" and settings.IDEMPOTENCY_ENABLED and scope["method"] == "POST":
+            key = dict(scope["headers"]).get(b"idempotency-key")
+        if key is None or not any(route.fullmatch(scope["path"]) for route in self.routes):
+            await self.app(scope, receive, send)
+            return
+
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await send_json(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        body = await read_body(receive)
+        request_fingerprint = fingerprint(scope, body)
+        owner = request_owner(scope["headers"], request_fingerprint)
+        if owner is None:
+            # The route rejects the token itself
+            await self.app(scope, receive_once(body), send)
+            return
+
+        # A duplicate of a request running in this worker waits for it
+        # without holding an admission slot
+        first = _in_flight.get((owner, key))
+        if first is not None:
+            await asyncio.wait({first}, timeout=settings.IDEMPOTENCY_WAIT_SECONDS)
+
+        # Registrations are admitted before the key is claimed, so callers
+        # turned away by the gate never write to the database
+        with ExitStack() as stack:
+            gate_key = admission.gate_key(scope["path"])
+            if gate_key is not None:
+                ticket_token = dict(scope["headers"]).get(b"x-admission-ticket")
+                try:
+                    stack.enter_context(admission.hold_admission(
+                        gate_key, ticket_token.decode("latin-1") if ticket_token else None
+                    ))
+                except HTTPException as exc:
+                    metrics.increment("idempotency_requests_total", outcome="not_admitted")
+                    headers = [(name.lower().encode(), value.encode()) for name, value in (exc.headers or {}).items()]
+                    await send_json(send, exc.status_code, exc.detail, headers)
+                    return
+            await self._claim_and_run(scope, send, owner, key, body, request_fingerprint)
+
+    async def _claim_and_run(self, scope, send, owner: str, key: str, body: bytes, request_fingerprint: str) -> None:
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            record = await anyio.to_thread.run_sync(claim, owner, key, request_fingerprint)
+            if record is None:
+                break
+            if record.fingerprint != request_fingerprint:
+                metrics.increment("idempotency_requests_total", outcome="mismatch")
+                await send_json(send, 422, "Idempotency-Key was already used for a different request")
+                return
+            if record.status_code is not None:
+                metrics.increment("idempotency_requests_total", outcome="replayed")
+                await replay(send, record)
+                return
+
+            # The first request is still running
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                metrics.increment("idempotency_requests_total", outcome="conflict")
+                await send_json(
+                    send, 409, "A request with this Idempotency-Key is still in progress",
+                    [(b"retry-after", b"1")]
+                )
+                return
+            first = _in_flight.get((owner, key))
+            if first is not None:
+                await asyncio.wait({first}, timeout=remaining)
+            else:
+                await asyncio.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+        metrics.increment("idempotency_requests_total", outcome="executed")
+        await self._run(scope, send, owner, key, body)
+
+    async def _run(self, scope, send, owner: str, key: str, body: bytes) -> None:
+        finished = asyncio.get_running_loop().create_future()
+        _in_flight[(owner, key)] = finished
+
+        status_code: Optional[int] = None
+        headers: List[Tuple[bytes, bytes]] = []
+        response_body = []
+
+        async def capture(message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, receive_once(body), capture)
+            completed = True
+        finally:
+            try:
+                if completed and status_code is not None and status_code < 500 and status_code not in _UNSTORED_STATUSES:
+                    await anyio.to_thread.run_sync(store, owner, key, status_code, headers, b"".join(response_body))
+                else:
+                    await anyio.to_thread.run_sync(release, owner, key)
+            finally:
+                # Waiters re-read the row, so they see the stored response or claim the key
+                del _in_flight[(owner, key)]
+                finished.set_result(None)
+
+
+metrics.register_gauge("idempotency_in_flight", lambda: len(_in_flight))
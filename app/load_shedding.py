@@ -0,0 +1,153 @@
+"""
+Load shedding for database pool and threadpool saturation.
+
+`pool_monitor` records how long requests wait for a pooled connection. The
+middleware combines that with threadpool occupancy into a single pressure
+value and rejects lower-priority routes with 503 + Retry-After before they
+queue up behind the saturated resources. Auth and non-API routes such as
+/health and /ready are never shed.
+"""
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+import anyio.to_thread
+from fastapi.responses import JSONResponse
+
+from app import metrics
+from app.config import settings
+
+# Seconds for a recorded pool wait to decay to ~37% of its value
+POOL_WAIT_DECAY_SECONDS = 2.0
+POOL_WAIT_SMOOTHING = 0.2
+
+# Priority class per router prefix; reads on listing routers are "listings",
+# while writes there are admin-only and shed with the admin class. Any path
+# ending in /register is a registration, whichever router serves it.
+ROUTER_CLASSES = {
+    "/auth": "auth",
+    "/registrations": "registrations",
+    "/checkins": "registrations",
+    "/events": "listings",
+    "/series": "listings",
+    "/colleges": "listings",
+    "/users": "admin",
+    "/profiles": "admin",
+}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class PoolMonitor:
+    """
+    Tracks connection checkout waits across all threads
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting: Dict[int, float] = {}
+        self._ewma_ms = 0.0
+        self._updated = time.monotonic()
+
+    def checkout_started(self) -> None:
+        with self._lock:
+            self._waiting[threading.get_ident()] = time.monotonic()
+
+    def checkout_finished(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            started = self._waiting.pop(threading.get_ident(), now)
+            waited_ms = (now - started) * 1000
+            self._ewma_ms = self._decayed(now) * (1 - POOL_WAIT_SMOOTHING) + waited_ms * POOL_WAIT_SMOOTHING
+            self._updated = now
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def wait_ms(self) -> float:
+        """
+        Recent checkout wait, or the longest wait still in progress if higher
+        """
+        now = time.monotonic()
+        with self._lock:
+            longest = max(self._waiting.values(), default=now)
+            return max(self._decayed(now), (now - longest) * 1000)
+
+    def _decayed(self, now: float) -> float:
+        return self._ewma_ms * math.exp(-(now - self._updated) / POOL_WAIT_DECAY_SECONDS)
+
+
+pool_monitor = PoolMonitor()
+
+
+def threadpool_occupancy() -> float:
+    """
+    Fraction of the default anyio worker threads in use (call from the event loop)
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return limiter.borrowed_tokens / limiter.total_tokens
+
+
+def current_pressure() -> float:
+    """
+    Load relative to the configured thresholds; 1.0 means a threshold is reached
+    """
+    return max(
+        pool_monitor.wait_ms() / settings.LOAD_SHED_POOL_WAIT_MS,
+        threadpool_occupancy() / settings.LOAD_SHED_THREADPOOL_OCCUPANCY,
+    )
+
+
+def route_priority(method: str, path: str) -> Optional[str]:
+    """
+    Priority class for a request, or None for routes that are never shed
+    """
+    prefix = settings.API_V1_PREFIX
+    if not path.startswith(prefix + "/"):
+        return None
+
+    router_path = path[len(prefix):]
+    # Registrations through other routers, e.g. for a series occurrence
+    if router_path.endswith("/register"):
+        return "registrations"
+    for router_prefix, priority in ROUTER_CLASSES.items():
+        if router_path == router_prefix or router_path.startswith(router_prefix + "/"):
+            if priority == "listings" and method not in READ_METHODS:
+                return "admin"
+            return priority
+    return "admin"
+
+
+class LoadSheddingMiddleware:
+    """
+    Rejects requests whose priority class sheds at the current pressure
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.levels = settings.load_shed_levels
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.LOAD_SHEDDING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        priority = route_priority(scope["method"], scope["path"])
+        level = self.levels.get(priority)
+        if level is not None and current_pressure() >= level:
+            metrics.increment("load_shed_rejections_total", priority=priority)
+            response = JSONResponse(
+                {"detail": "Server is overloaded, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+metrics.register_gauge("db_pool_waiting", lambda: pool_monitor.waiting)
+metrics.register_gauge("db_pool_wait_ms", pool_monitor.wait_ms)
+metrics.register_gauge("threadpool_occupancy", threadpool_occupancy)
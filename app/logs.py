@@ -0,0 +1,247 @@
+"""
+Structured logging.
+
+Every logger writes through a QueueHandler on the root logger; a single
+listener thread formats the records (as JSON by default) and writes them to
+stdout. Request threads and the event loop only ever put a record on a
+bounded queue, so a slow or blocked stdout cannot stall them. When the queue
+is full, records are dropped and counted in log_records_dropped_total rather
+than waited on. SQL echo under DEBUG goes through the same queue.
+
+AccessLogMiddleware writes one record per request to the "app.access" logger
+with the route, status, latency, number of SQL statements and user ID.
+Successful requests can be sampled with LOG_ACCESS_SAMPLE_RATE; errors and
+requests slower than LOG_SLOW_REQUEST_MS are always logged, and each record
+carries the rate it was sampled at.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app import metrics
+from app.config import settings
+
+access_logger = logging.getLogger("app.access")
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName", "color_message"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, with `extra` fields at the top level
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues without ever blocking; drops the record when the queue is full
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments and render the traceback here, while they are
+        # still valid, but leave the formatting proper to the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("log_records_dropped_total", logger=record.name)
+
+
+_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+def _after_fork() -> None:
+    # The parent's writer thread did not survive the fork and its queue may
+    # hold records the parent will write itself, so start afresh
+    _handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through the queue and start the listener
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    # LOG_LEVEL applies to the app's own loggers; libraries only report warnings
+    root.setLevel(logging.WARNING)
+    logging.getLogger("app").setLevel(settings.LOG_LEVEL.upper())
+
+    # Uvicorn's own messages go through the queue too; its access log is
+    # replaced by AccessLogMiddleware
+    for name in ("uvicorn", "uvicorn.error"):
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.propagate = True
+    logging.getLogger("uvicorn.access").disabled = True
+
+    if settings.DEBUG:
+        # SQL echo, written by the listener rather than the request thread
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    start_listener()
+
+
+def start_listener() -> None:
+    """
+    Start the writer thread for this process. Safe to call again; a forked
+    worker gets its own thread, since threads do not survive fork.
+    """
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    _listener = logging.handlers.QueueListener(_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def stop_listener() -> None:
+    """
+    Write out what is still queued and stop the writer thread
+    """
+    global _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener_pid = None
+
+
+metrics.register_gauge("log_queue_depth", lambda: _handler.queue.qsize())
+
+
+class RequestLogContext:
+    """
+    Per-request details filled in by code the request runs, including in
+    threadpool workers (which share this object through the copied context)
+    """
+
+    __slots__ = ("queries", "user_id")
+
+    def __init__(self):
+        self.queries = 0
+        self.user_id: Optional[int] = None
+
+
+_request_context: contextvars.ContextVar[Optional[RequestLogContext]] = contextvars.ContextVar(
+    "request_log_context", default=None
+)
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    """
+    before_cursor_execute listener counting statements per request
+    """
+    request_context = _request_context.get()
+    if request_context is not None:
+        request_context.queries += 1
+
+
+def set_user(user_id: int) -> None:
+    """
+    Record the authenticated user for the current request's access log
+    """
+    request_context = _request_context.get()
+    if request_context is not None:
+        request_context.user_id = user_id
+
+
+class AccessLogMiddleware:
+    """
+    Writes one structured access log record per HTTP request
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.LOG_ACCESS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_context = RequestLogContext()
+        token = _request_context.set(request_context)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_context.reset(token)
+            latency_ms = (time.perf_counter() - started) * 1000
+            self._log(scope, status_code, latency_ms, request_context)
+
+    @staticmethod
+    def _log(scope, status_code: int, latency_ms: float, request_context: RequestLogContext) -> None:
+        # Errors and slow requests are always logged; the rest are sampled
+        sample_rate = 1.0
+        if status_code < 400 and latency_ms < settings.LOG_SLOW_REQUEST_MS:
+            sample_rate = settings.LOG_ACCESS_SAMPLE_RATE
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                return
+
+        client = scope.get("client")
+        access_logger.info(
+            "%s %s %d",
+            scope["method"], scope["path"], status_code,
+            extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("endpoint"), "__name__", None),
+                "status": status_code,
+                "latency_ms": round(latency_ms, 2),
+                "queries": request_context.queries,
+                "user_id": request_context.user_id,
+                "client": client[0] if client else None,
+                "sample_rate": sample_rate,
+            }
+        )
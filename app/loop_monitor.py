@@ -0,0 +1,206 @@
+"""
+Event-loop stall detection.
+
+A heartbeat task ticks on the event loop and a watchdog thread checks how
+late it is. When the loop has not ticked for LOOP_STALL_THRESHOLD_MS, the
+watchdog captures the loop thread's stack while the blocking code is still
+running, and attributes the stall to the task that was running: a request's
+route (tracked by LoopMonitorMiddleware) or a named background task. Once
+the loop recovers, the stall is counted in the metrics and logged with its
+duration and stack.
+
+With LOOP_MONITOR_FAIL_ON_BLOCKING (meant for tests), a request that stalled
+the loop raises BlockingCallError when it finishes, so any blocking call on
+an async path fails the test that exercised it.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, NamedTuple, Optional
+
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames from these modules name the code that blocked
+_ATTRIBUTION_MODULES = ("app.routers.", "app.dependencies")
+
+# Innermost frames of a loop thread waiting for events. The asyncio loop
+# waits in select; uvloop waits in C, so there the innermost frame is the one
+# that started the loop (asyncio.Runner.run, or uvicorn's asyncio_run on 3.10)
+_IDLE_LOOP_FRAMES = {
+    ("selectors.py", "select"),
+    (os.path.join("asyncio", "runners.py"), "run"),
+    (os.path.join("uvicorn", "_compat.py"), "asyncio_run"),
+}
+
+
+class Stall(NamedTuple):
+    duration_ms: float
+    route: str
+    function: str
+    stack: List[str]
+
+
+class BlockingCallError(RuntimeError):
+    """
+    Raised in fail-on-blocking mode by a request that stalled the event loop
+    """
+
+
+def loop_idle(frame) -> bool:
+    """
+    Whether the innermost frame of an event-loop thread shows it waiting for events
+    """
+    code = frame.f_code
+    return any(
+        code.co_name == name and code.co_filename.endswith(os.sep + filename)
+        for filename, name in _IDLE_LOOP_FRAMES
+    )
+
+
+def _attribute(frame) -> str:
+    """
+    Innermost route or dependency function on the stack, else the function
+    that was executing
+    """
+    leaf = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        name = f"{module}.{frame.f_code.co_name}"
+        leaf = leaf or name
+        if module.startswith(_ATTRIBUTION_MODULES):
+            return name
+        frame = frame.f_back
+    return leaf or "unknown"
+
+
+class LoopMonitor:
+    """
+    Heartbeat on the loop plus a watchdog thread measuring its lag
+    """
+
+    def __init__(self):
+        self.requests: Dict[asyncio.Task, dict] = {}
+        self.blocked: Dict[asyncio.Task, List[Stall]] = {}
+        self.last_beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    @property
+    def interval(self) -> float:
+        # Beat often enough that a stall is seen within about half the threshold
+        return max(settings.LOOP_STALL_THRESHOLD_MS / 2000, 0.005)
+
+    def lag_ms(self) -> float:
+        if not self.running:
+            return 0.0
+        return max(0.0, (time.monotonic() - self.last_beat - self.interval) * 1000)
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._beat(), name="loop-monitor:heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        self._watchdog.join()
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self._heartbeat = None
+
+    async def _beat(self) -> None:
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        threshold = settings.LOOP_STALL_THRESHOLD_MS / 1000
+        while not self._stop.wait(self.interval / 2):
+            beat = self.last_beat
+            if time.monotonic() - beat - self.interval < threshold:
+                continue
+
+            # Still stalled: capture what the loop thread is running right now
+            task = asyncio.current_task(self._loop)
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None and loop_idle(frame):
+                # Waiting for events: the heartbeat timer is merely late
+                continue
+            function = _attribute(frame) if frame is not None else "unknown"
+            stack = traceback.format_stack(frame) if frame is not None else []
+            del frame
+
+            while self.last_beat == beat and not self._stop.wait(self.interval / 4):
+                pass
+            duration_ms = (time.monotonic() - beat - self.interval) * 1000
+            self._record(Stall(round(duration_ms, 1), self._route(task), function, stack), task)
+
+    def _route(self, task: Optional[asyncio.Task]) -> str:
+        if task is None:
+            return "callback"
+        scope = self.requests.get(task)
+        if scope is None:
+            return task.get_name()
+        endpoint = getattr(scope.get("endpoint"), "__name__", None)
+        return endpoint or f"{scope['method']} {scope['path']}"
+
+    def _record(self, stall: Stall, task: Optional[asyncio.Task]) -> None:
+        metrics.increment("event_loop_stalls_total", route=stall.route, function=stall.function)
+        metrics.increment("event_loop_stall_seconds_total", stall.duration_ms / 1000, route=stall.route)
+        logger.warning(
+            "Event loop blocked for %.0f ms by %s in %s\n%s",
+            stall.duration_ms, stall.function, stall.route, "".join(stall.stack)
+        )
+        if settings.LOOP_MONITOR_FAIL_ON_BLOCKING and task in self.requests:
+            self.blocked.setdefault(task, []).append(stall)
+
+
+monitor = LoopMonitor()
+
+
+class LoopMonitorMiddleware:
+    """
+    Tracks which request each task serves so stalls name their route
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not monitor.running:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        monitor.requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            del monitor.requests[task]
+            stalls = monitor.blocked.pop(task, None)
+
+        if stalls:
+            details = "\n".join(
+                f"{stall.duration_ms:.0f} ms in {stall.function}\n{''.join(stall.stack)}" for stall in stalls
+            )
+            raise BlockingCallError(f"{scope['method']} {scope['path']} blocked the event loop:\n{details}")
+
+
+metrics.register_gauge("event_loop_lag_ms", monitor.lag_ms)
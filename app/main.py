@@ -1,8 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, OperationalError, TimeoutError as PoolTimeoutError
 
+from app import idempotency, logs, metrics, scheduler, trending, warmup
+from app.availability import hub as availability_hub
 from app.config import settings
-from app.routers import auth, events, registrations, colleges, users
+from app.database import QUERY_CANCELED, IDLE_IN_TRANSACTION_SESSION_TIMEOUT, pgcode, route_name
+from app.dependencies import get_current_admin_user
+from app.idempotency import IdempotencyMiddleware
+from app.load_shedding import LoadSheddingMiddleware
+from app.logs import AccessLogMiddleware
+from app.loop_monitor import LoopMonitorMiddleware, monitor as loop_monitor
+from app.profiling import ProfilingMiddleware
+from app.single_flight import SingleFlightMiddleware
+from app.routers import auth, events, registrations, colleges, users, stats, checkins, series, profiles
+
+# Send all logging through the non-blocking queue
+logs.configure_logging()
+
+# Background jobs
+scheduler.add_job("refresh_stats", settings.STATS_REFRESH_INTERVAL_SECONDS, stats.refresh_stats)
+scheduler.add_job("rank_trending", settings.TRENDING_RECOMPUTE_INTERVAL_SECONDS, trending.recompute_ranking)
+scheduler.add_job("prune_idempotency_keys", settings.IDEMPOTENCY_PRUNE_INTERVAL_SECONDS, idempotency.prune_expired)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the log writer, loop monitor, background jobs and the availability
+    listener with the app, warm the worker up in the background, and stop them
+    on shutdown
+    """
+    logs.start_listener()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    jobs = scheduler.start()
+    if settings.AVAILABILITY_STREAM_ENABLED:
+        availability_hub.start()
+    warmup_task = asyncio.create_task(warmup.run(app), name="warmup")
+    yield
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+    if settings.AVAILABILITY_STREAM_ENABLED:
+        await availability_hub.stop()
+    await scheduler.stop(jobs)
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    logs.stop_listener()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -11,9 +60,25 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
+# Answer retried POSTs that carry an Idempotency-Key from their stored response
+app.add_middleware(IdempotencyMiddleware)
+
+# Let identical concurrent reads share one computation
+app.add_middleware(SingleFlightMiddleware)
+
+# Reject low-priority requests early when the DB pool or threadpool is saturated
+app.add_middleware(LoadSheddingMiddleware)
+
+# Profile admin-flagged and randomly sampled requests
+app.add_middleware(ProfilingMiddleware)
+
+# Attribute event-loop stalls to the request that caused them
+app.add_middleware(LoopMonitorMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +88,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Structured access log covering the whole middleware stack
+app.add_middleware(AccessLogMiddleware)
+
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError):
+    """
+    Map database timeouts and outages to 504/503 instead of a bare 500.
+    Registered for DBAPIError and dispatched on the SQLSTATE, since psycopg2
+    raises the idle-in-transaction timeout as an InternalError; any other
+    error is re-raised.
+    """
+    code = pgcode(exc)
+    if code == QUERY_CANCELED:
+        metrics.increment("db_statement_timeouts_total", route=route_name(request))
+        return JSONResponse(
+            status_code=504,
+            content={"detail": "Database query timed out"}
+        )
+
+    if code == IDLE_IN_TRANSACTION_SESSION_TIMEOUT:
+        metrics.increment("db_idle_transaction_timeouts_total", route=route_name(request))
+    elif isinstance(exc, OperationalError):
+        metrics.increment("db_unavailable_total", route=route_name(request))
+    else:
+        raise exc
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database unavailable, please retry shortly"},
+        headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)}
+    )
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """
+    No pooled connection became free within DB_POOL_TIMEOUT
+    """
+    metrics.increment("db_pool_timeouts_total", route=route_name(request))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)}
+    )
+
 
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
@@ -30,10 +140,14 @@ app.include_router(users.router, prefix=settings.API_V1_PREFIX)
 app.include_router(events.router, prefix=settings.API_V1_PREFIX)
 app.include_router(registrations.router, prefix=settings.API_V1_PREFIX)
 app.include_router(colleges.router, prefix=settings.API_V1_PREFIX)
+app.include_router(stats.router, prefix=settings.API_V1_PREFIX)
+app.include_router(checkins.router, prefix=settings.API_V1_PREFIX)
+app.include_router(series.router, prefix=settings.API_V1_PREFIX)
+app.include_router(profiles.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
-def root():
+async def root():
     """
     Root endpoint
     """
@@ -46,13 +160,36 @@ def root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """
-    Health check endpoint
+    Health check endpoint (served on the event loop so a busy threadpool
+    cannot delay it)
     """
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint: 503 until this worker has finished warming up
+    """
+    if not warmup.state.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming up"},
+            headers={"Retry-After": "1"}
+        )
+    return {"status": "ready", "warmup_ms": warmup.state.timings_ms}
+
+
+@app.get("/metrics", dependencies=[Depends(get_current_admin_user)])
+async def get_metrics():
+    """
+    In-process metrics for this worker (admin only)
+    """
+    return metrics.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,45 @@
+"""
+Minimal in-process metrics registry.
+
+Counters are keyed by name and label set; gauges are callables sampled when a
+snapshot is taken. Values are kept per worker process and exposed as JSON on
+the /metrics endpoint.
+"""
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+_gauges: Dict[str, Callable[[], float]] = {}
+
+
+def increment(name: str, value: float = 1, **labels: str) -> None:
+    """
+    Add `value` to the counter identified by name and labels
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def register_gauge(name: str, read: Callable[[], float]) -> None:
+    """
+    Register a callable that reports the current value of a gauge
+    """
+    _gauges[name] = read
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Return all counters and the current value of every gauge
+    """
+    with _lock:
+        items = list(_counters.items())
+
+    counters: Dict[str, List[Dict]] = {}
+    for (name, labels), value in sorted(items):
+        counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+
+    gauges = {name: read() for name, read in sorted(_gauges.items())}
+    return {"counters": counters, "gauges": gauges}
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, BigInteger, String, Boolean, Text, DateTime, ForeignKey, Index, LargeBinary, UniqueConstraint, func, select
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, TSRANGE
+from sqlalchemy.orm import column_property, deferred, relationship
 from datetime import datetime
 import bcrypt
 import hashlib
@@ -40,6 +41,7 @@ class User(Base):
 
     # Relationships
     registrations = relationship("Registration", back_populates="user", cascade="all, delete-orphan")
+    waitlist_entries = relationship("WaitlistEntry", back_populates="user", cascade="all, delete-orphan")
     created_events = relationship("Event", back_populates="creator", cascade="all, delete-orphan")
     student_profile = relationship("Student", back_populates="user", uselist=False, cascade="all, delete-orphan")
 
@@ -88,6 +90,18 @@ class Student(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_sync_version_id", "sync_version", "id"),
+        # One materialized row per series occurrence; also serves window lookups
+        UniqueConstraint("series_id", "occurrence_start", name="uq_events_series_id_occurrence_start"),
+        # No two events in the same venue may overlap (needs btree_gist)
+        ExcludeConstraint(
+            (func.lower(Column("venue")), "="),
+            ("during", "&&"),
+            name="ex_events_venue_during",
+            using="gist",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
@@ -98,14 +112,27 @@ class Event(Base):
     capacity = Column(Integer, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set by a database trigger to the writing transaction's ID on every
+    # insert and update; drives GET /events/changes
+    sync_version = Column(BigInteger, nullable=False, server_default="0")
+    # Set when the event is a materialized occurrence of a series
+    series_id = Column(Integer, ForeignKey("event_series.id"), nullable=True)
+    occurrence_start = Column(DateTime, nullable=True)
+    # Time the venue is booked; events without an end time occupy their start instant
+    during = deferred(Column(TSRANGE, Computed(
+        "CASE WHEN end_time IS NULL THEN tsrange(start_time, start_time, '[]') "
+        "ELSE tsrange(start_time, end_time, '[)') END",
+        persisted=True
+    )))
 
     # Relationships
     creator = relationship("User", back_populates="created_events")
+    series = relationship("EventSeries", back_populates="events")
     registrations = relationship("Registration", back_populates="event", cascade="all, delete-orphan")
+    waitlist_entries = relationship("WaitlistEntry", back_populates="event", cascade="all, delete-orphan")
 
-    @property
-    def registered_count(self) -> int:
-        return len(self.registrations)
+    # registered_count is a column_property defined after Registration below
 
     @property
     def is_full(self) -> bool:
@@ -114,8 +141,40 @@ class Event(Base):
         return self.registered_count >= self.capacity
 
 
+class EventSeries(Base):
+    """
+    Recurring event; occurrences are expanded from the rule on demand and
+    only stored as events once they get registrations or overrides
+    """
+    __tablename__ = "event_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    venue = Column(String(255), nullable=True)
+    capacity = Column(Integer, nullable=True)
+    start_time = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=True)
+    frequency = Column(String(20), nullable=False)
+    interval = Column(Integer, nullable=False, default=1)
+    count = Column(Integer, nullable=True)
+    until = Column(DateTime, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    events = relationship("Event", back_populates="series", cascade="all, delete-orphan")
+
+
 class Registration(Base):
     __tablename__ = "registrations"
+    __table_args__ = (
+        # registered_count and event registration lists filter by event;
+        # my-registrations and ticket lookups by user (and event) through
+        # the unique constraint's index
+        Index("ix_registrations_event_id", "event_id"),
+        UniqueConstraint("user_id", "event_id", name="uq_registrations_user_id_event_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -125,3 +184,91 @@ class Registration(Base):
     # Relationships
     user = relationship("User", back_populates="registrations")
     event = relationship("Event", back_populates="registrations")
+
+
+# Counted in SQL when events are loaded, so responses never hydrate the
+# registrations collection and stay serializable after the session closes
+Event.registered_count = column_property(
+    select(func.count(Registration.id))
+    .where(Registration.event_id == Event.id)
+    .correlate_except(Registration)
+    .scalar_subquery()
+)
+
+
+class WaitlistEntry(Base):
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "event_id", name="uq_waitlist_entries_user_id_event_id"),
+        # Queue order within an event; promotion reads the head through this index
+        Index("ix_waitlist_entries_event_id_id", "event_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User", back_populates="waitlist_entries")
+    event = relationship("Event", back_populates="waitlist_entries")
+
+
+class EventRegistrationBucket(Base):
+    """
+    Net registrations per event per hour, used to rank trending events
+    """
+    __tablename__ = "event_registration_buckets"
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+    registrations = Column(Integer, nullable=False, default=0)
+
+
+class EventTombstone(Base):
+    """
+    Deleted event IDs, written by a trigger on events so sync clients can
+    drop them without refetching the catalog
+    """
+    __tablename__ = "event_tombstones"
+    __table_args__ = (
+        Index("ix_event_tombstones_sync_version_event_id", "sync_version", "event_id"),
+    )
+
+    event_id = Column(Integer, primary_key=True)
+    sync_version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class CheckIn(Base):
+    """
+    First recorded gate scan of a registration's ticket
+    """
+    __tablename__ = "checkins"
+
+    registration_id = Column(Integer, ForeignKey("registrations.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    checked_in_at = Column(DateTime, nullable=False)
+    scanner_id = Column(String(100), nullable=True)
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of a POST sent with an Idempotency-Key, replayed to retries
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("owner", "key", name="uq_idempotency_keys_owner_key"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    owner = Column(String(64), nullable=False)  # "user:<id>" or "anonymous:<fingerprint prefix>"
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of method, path and body
+    # NULL while the first request is still running
+    status_code = Column(Integer, nullable=True)
+    response_headers = Column(Text, nullable=True)  # JSON list of [name, value]
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    locked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
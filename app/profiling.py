@@ -0,0 +1,297 @@
+"""
+Sampling CPU profiler for single requests.
+
+Admins profile one request by sending `X-Profile: 1` or `?profile=1`; other
+callers' flags are ignored. PROFILE_SAMPLE_RATE additionally profiles a
+random fraction of all traffic, one request at a time, so the overhead stays
+bounded. While a profiled request is in flight, a background thread samples
+the stacks of the event-loop thread and of the threadpool workers (where sync
+routes, dependencies, bcrypt and ORM work run) every PROFILE_INTERVAL_MS,
+skipping threads that are idle.
+
+Profiles are stored in PROFILE_DIR in speedscope format
+(https://www.speedscope.app), with one lane per thread, and the response
+carries their ID in X-Profile-Id. Samples are taken per thread rather than
+per request, so work of other requests running at the same moment shows up
+too; each profile records the peak number of concurrent requests so it can be
+read with that in mind.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import anyio.to_thread
+from fastapi import HTTPException
+
+from app import metrics
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.dependencies import get_current_admin_user, get_current_user
+from app.loop_monitor import loop_idle
+
+WORKER_THREAD_NAME = "AnyIO worker thread"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+PROFILE_ID = re.compile(r"\d{13}-[0-9a-f]{8}")
+
+# Innermost frames of a thread with nothing to do: the loop waiting in
+# select, or a worker waiting for its next job (uvloop's idle loop is
+# recognised by loop_idle)
+_IDLE_FRAMES = {("selectors.py", "select"), ("queue.py", "get")}
+_IDLE_DEPTH = 3
+
+FrameKey = Tuple[str, str, int]
+
+
+class Sampler:
+    """
+    Samples the event-loop and worker thread stacks until stopped
+    """
+
+    def __init__(self, loop_thread_id: int, concurrency: Callable[[], int]):
+        self.loop_thread_id = loop_thread_id
+        self.concurrency = concurrency
+        self.interval = settings.PROFILE_INTERVAL_MS / 1000
+        self.frames: Dict[FrameKey, int] = {}
+        self.lanes: Dict[int, Dict] = {}
+        self.samples = 0
+        self.peak_concurrency = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + settings.PROFILE_MAX_SECONDS
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            now = time.perf_counter()
+            self._sample((now - last) * 1000)
+            last = now
+
+    def _sample(self, weight_ms: float) -> None:
+        names = {thread.ident: "worker" for thread in threading.enumerate() if thread.name == WORKER_THREAD_NAME}
+        names[self.loop_thread_id] = "event loop"
+        self.peak_concurrency = max(self.peak_concurrency, self.concurrency())
+
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id)
+            if name is None:
+                continue
+            stack = self._stack(frame)
+            if stack is None:
+                continue
+            lane = self.lanes.setdefault(thread_id, {"name": f"{name} {thread_id}", "samples": [], "weights": []})
+            lane["samples"].append(stack)
+            lane["weights"].append(round(weight_ms, 3))
+            self.samples += 1
+
+    def _stack(self, frame) -> Optional[List[int]]:
+        """
+        Frame indices from root to leaf, or None for an idle thread
+        """
+        if loop_idle(frame):
+            return None
+        keys = []
+        while frame is not None:
+            code = frame.f_code
+            keys.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+
+        for name, filename, _ in keys[:_IDLE_DEPTH]:
+            if (os.path.basename(filename), name.rpartition(".")[2]) in _IDLE_FRAMES:
+                return None
+        return [self.frames.setdefault(key, len(self.frames)) for key in reversed(keys)]
+
+    def to_speedscope(self, name: str) -> Dict:
+        lanes = sorted(self.lanes.items(), key=lambda item: item[0] != self.loop_thread_id)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "event-manager-api",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [{"name": function, "file": file, "line": line} for function, file, line in self.frames]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": lane["name"],
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(lane["weights"]), 3),
+                    "samples": lane["samples"],
+                    "weights": lane["weights"],
+                }
+                for _, lane in lanes
+            ],
+        }
+
+
+def _profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+
+def save_profile(profile_id: str, document: Dict, info: Dict) -> None:
+    """
+    Store a profile and its summary, keeping the newest PROFILE_MAX_STORED
+    """
+    directory = _profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile_id}.speedscope.json").write_text(json.dumps(document))
+    (directory / f"{profile_id}.meta.json").write_text(json.dumps(info))
+
+    # IDs start with a millisecond timestamp, so name order is age order
+    stored = sorted(directory.glob("*.meta.json"), reverse=True)
+    for meta in stored[settings.PROFILE_MAX_STORED:]:
+        old_id = meta.name[:-len(".meta.json")]
+        meta.unlink(missing_ok=True)
+        (directory / f"{old_id}.speedscope.json").unlink(missing_ok=True)
+
+
+def list_profiles() -> List[Dict]:
+    """
+    Summaries of the stored profiles, newest first
+    """
+    directory = _profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for meta in sorted(directory.glob("*.meta.json"), reverse=True):
+        try:
+            profiles.append(json.loads(meta.read_text()))
+        except (OSError, ValueError):
+            continue  # Pruned or half-written by another worker
+    return profiles
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """
+    Path of a stored speedscope file, or None if there is no such profile
+    """
+    if not PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = _profile_dir() / f"{profile_id}.speedscope.json"
+    return path if path.is_file() else None
+
+
+def profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.strip().lower() in (b"1", b"true")
+    values = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [])
+    return any(value.lower() in ("1", "true") for value in values)
+
+
+async def is_admin(scope) -> bool:
+    """
+    Whether the request's bearer token belongs to an active admin
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                current_user = await anyio.to_thread.run_sync(
+                    lambda: get_current_user(token=token, db=ReadSessionLocal())
+                )
+                await get_current_admin_user(current_user=current_user)
+            except HTTPException:
+                return False
+            return current_user.is_active
+    return False
+
+
+class ProfilingMiddleware:
+    """
+    Runs admin-flagged and randomly sampled requests under the Sampler
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        self.sampling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            trigger = await self._trigger(scope)
+            if trigger is None:
+                await self.app(scope, receive, send)
+            else:
+                await self._profile(scope, receive, send, trigger)
+        finally:
+            self.in_flight -= 1
+
+    async def _trigger(self, scope) -> Optional[str]:
+        if profile_requested(scope):
+            return "admin" if await is_admin(scope) else None
+
+        # Random sampling skips streams, which would hold the single slot for minutes
+        if (
+            settings.PROFILE_SAMPLE_RATE > 0
+            and not self.sampling
+            and random.random() < settings.PROFILE_SAMPLE_RATE
+            and (b"accept", b"text/event-stream") not in scope["headers"]
+        ):
+            return "sampled"
+        return None
+
+    async def _profile(self, scope, receive, send, trigger: str) -> None:
+        profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        if trigger == "sampled":
+            self.sampling = True
+        sampler = Sampler(threading.get_ident(), lambda: self.in_flight)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            if trigger == "sampled":
+                self.sampling = False
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        route = getattr(scope.get("endpoint"), "__name__", "unknown")
+        info = {
+            "id": profile_id,
+            "trigger": trigger,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "samples": sampler.samples,
+            "peak_concurrent_requests": sampler.peak_concurrency,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        document = sampler.to_speedscope(f"{scope['method']} {scope['path']} -> {status_code} in {duration_ms:.1f} ms")
+        await anyio.to_thread.run_sync(save_profile, profile_id, document, info)
+        metrics.increment("request_profiles_total", trigger=trigger, route=route)
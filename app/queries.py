@@ -0,0 +1,48 @@
+"""
+Pre-built statements for the lookups that run on nearly every request.
+
+A legacy `db.query(...).filter(...)` is rebuilt on every call, and its cache
+key has to be recomputed before SQLAlchemy can find the compiled SQL. These
+statements are built once at import with bound parameters; their cache key is
+memoized, so a call only binds values and reuses the compiled form.
+"""
+from typing import Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models import Event, User
+
+_user_by_id = select(User).where(User.id == bindparam("user_id"))
+_user_by_username = select(User).where(User.username == bindparam("username"))
+_user_id_by_username = select(User.id).where(User.username == bindparam("username"))
+_event_by_id = select(Event).where(Event.id == bindparam("event_id"))
+_event_capacity_for_update = (
+    select(Event.id, Event.capacity)
+    .where(Event.id == bindparam("event_id"))
+    .with_for_update()
+)
+
+
+def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    return db.execute(_user_by_id, {"user_id": user_id}).scalars().first()
+
+
+def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    return db.execute(_user_by_username, {"username": username}).scalars().first()
+
+
+def username_exists(db: Session, username: str) -> bool:
+    return db.execute(_user_id_by_username, {"username": username}).first() is not None
+
+
+def get_event_by_id(db: Session, event_id: int) -> Optional[Event]:
+    return db.execute(_event_by_id, {"event_id": event_id}).scalars().first()
+
+
+def lock_event_capacity(db: Session, event_id: int) -> Optional[Row]:
+    """
+    Lock an event row and return its (id, capacity), or None if it does not exist
+    """
+    return db.execute(_event_capacity_for_update, {"event_id": event_id}).first()
@@ -0,0 +1,104 @@
+"""
+Occurrence expansion for recurring event series.
+
+A series stores its rule once (first start, frequency, interval, optional
+count/until). Occurrences are generated on demand for a time window: the
+index of the first occurrence that can overlap the window is computed
+arithmetically, so expanding a window costs the same whether the series
+started last week or ten years ago.
+"""
+import calendar
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+_fixed_steps = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    """
+    Shift by whole months, clamping the day to the end of shorter months
+    """
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def nth_occurrence(series, n: int) -> datetime:
+    """
+    Start of the series' n-th occurrence (0-based), ignoring count/until
+    """
+    if series.frequency == "monthly":
+        return _add_months(series.start_time, n * series.interval)
+    return series.start_time + _fixed_steps[series.frequency] * (n * series.interval)
+
+
+def _first_index_after(series, moment: datetime, duration: timedelta) -> int:
+    """
+    Lowest index whose occurrence is not over by `moment`: it ends after
+    `moment`, or for instantaneous occurrences starts at or after it
+    """
+    def over(n: int) -> bool:
+        end = nth_occurrence(series, n) + duration
+        return end <= moment if duration else end < moment
+
+    if not over(0):
+        return 0
+
+    # Estimate, then correct by a step or two for duration and month lengths
+    if series.frequency == "monthly":
+        months = (moment.year - series.start_time.year) * 12 + moment.month - series.start_time.month
+        n = max(0, months // series.interval - 1)
+    else:
+        step = _fixed_steps[series.frequency] * series.interval
+        n = max(0, (moment - duration - series.start_time) // step)
+
+    while over(n):
+        n += 1
+    while n > 0 and not over(n - 1):
+        n -= 1
+    return n
+
+
+def series_duration(series) -> timedelta:
+    return timedelta(minutes=series.duration_minutes or 0)
+
+
+def _within_bounds(series, n: int, start: datetime) -> bool:
+    if series.count is not None and n >= series.count:
+        return False
+    if series.until is not None and start > series.until:
+        return False
+    return True
+
+
+def occurrences(series, window_start: datetime, window_end: datetime) -> Iterator[datetime]:
+    """
+    Yield start times of occurrences overlapping [window_start, window_end)
+    """
+    n = _first_index_after(series, window_start, series_duration(series))
+    while True:
+        start = nth_occurrence(series, n)
+        if start >= window_end or not _within_bounds(series, n, start):
+            return
+        yield start
+        n += 1
+
+
+def occurrence_index(series, start: datetime) -> Optional[int]:
+    """
+    Index of the occurrence starting exactly at `start`, or None if the
+    series has no occurrence then
+    """
+    if start < series.start_time:
+        return None
+    n = _first_index_after(series, start, timedelta(0))
+    if nth_occurrence(series, n) != start or not _within_bounds(series, n, start):
+        return None
+    return n
@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, Student, College
+from app.queries import get_user_by_username, username_exists
 from app.schemas import StudentSignup, UserResponse, Token, UserInToken, MessageResponse
-from app.dependencies import create_access_token
+from app.dependencies import create_access_token, get_current_user
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -16,8 +17,7 @@ def signup(student_data: StudentSignup, db: Session = Depends(get_db)):
     Register a new student user
     """
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == student_data.username).first()
-    if existing_user:
+    if username_exists(db, student_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this username already exists"
@@ -68,7 +68,7 @@ def signup(student_data: StudentSignup, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Login with username and password to get access token.
@@ -78,7 +78,8 @@ def login(
     - Password field = your password
     """
     # Find user by username (OAuth2PasswordRequestForm uses 'username' field)
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = get_user_by_username(db, form_data.username)
+    db.close()  # Release the connection before the slow bcrypt check
     
     if not user or not user.verify_password(form_data.password):
         raise HTTPException(
@@ -116,12 +117,9 @@ def login(
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Get current user information
     """
-    from app.dependencies import get_current_user
-    current_user = Depends(get_current_user)
     return current_user
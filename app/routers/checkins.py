@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db
+from app.models import User
+from app.schemas import CheckInSyncRequest, CheckInSyncResponse, TicketPublicKeyResponse
+from app.dependencies import get_current_admin_user
+from app.tickets import key_id, public_key, verify_ticket
+
+router = APIRouter(prefix="/checkins", tags=["Check-ins"])
+
+# Records every scan whose registration still exists in one statement,
+# keeping the earliest scan per registration, and returns the scanned
+# registrations that no longer exist
+_sync_checkins = text("""
+    WITH scans AS (
+        SELECT *
+        FROM unnest(
+            CAST(:registration_ids AS integer[]),
+            CAST(:event_ids AS integer[]),
+            CAST(:scanned_at AS timestamp[])
+        ) AS s(registration_id, event_id, scanned_at)
+    ),
+    valid AS (
+        SELECT scans.*
+        FROM scans
+        JOIN registrations r ON r.id = scans.registration_id AND r.event_id = scans.event_id
+    ),
+    recorded AS (
+        INSERT INTO checkins (registration_id, event_id, checked_in_at, scanner_id, synced_at)
+        SELECT registration_id, event_id, scanned_at, :scanner_id, :synced_at FROM valid
+        ON CONFLICT (registration_id) DO UPDATE
+        SET checked_in_at = EXCLUDED.checked_in_at,
+            scanner_id = EXCLUDED.scanner_id,
+            synced_at = EXCLUDED.synced_at
+        WHERE EXCLUDED.checked_in_at < checkins.checked_in_at
+        RETURNING registration_id
+    )
+    SELECT registration_id FROM scans
+    WHERE registration_id NOT IN (SELECT registration_id FROM valid)
+""")
+
+
+def to_utc(value: datetime) -> datetime:
+    """
+    Naive UTC datetime, as stored in the database
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.get("/public-key", response_model=TicketPublicKeyResponse)
+def get_ticket_public_key():
+    """
+    Get the public key scanners use to verify tickets offline
+    """
+    return TicketPublicKeyResponse(key_id=key_id, public_key=public_key())
+
+
+@router.post("/sync", response_model=CheckInSyncResponse)
+def sync_checkins(
+    sync_data: CheckInSyncRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Record a batch of offline ticket scans (admin only).
+    Safe to retry: each registration keeps its earliest scan. `invalid` lists
+    the indexes of scans whose ticket failed verification, `revoked` the
+    registrations that were cancelled after their ticket was issued.
+    """
+    if len(sync_data.scans) > settings.CHECKIN_SYNC_MAX_SCANS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CHECKIN_SYNC_MAX_SCANS} scans per sync"
+        )
+
+    # Verify signatures and keep the earliest scan of each registration
+    invalid = []
+    earliest = {}
+    for index, scan in enumerate(sync_data.scans):
+        claims = verify_ticket(scan.ticket)
+        if claims is None:
+            invalid.append(index)
+            continue
+        scanned_at = to_utc(scan.scanned_at)
+        current = earliest.get(claims.registration_id)
+        if current is None or scanned_at < current[1]:
+            earliest[claims.registration_id] = (claims.event_id, scanned_at)
+
+    revoked = []
+    if earliest:
+        registration_ids = sorted(earliest)
+        revoked = db.execute(_sync_checkins, {
+            "registration_ids": registration_ids,
+            "event_ids": [earliest[registration_id][0] for registration_id in registration_ids],
+            "scanned_at": [earliest[registration_id][1] for registration_id in registration_ids],
+            "scanner_id": sync_data.scanner_id,
+            "synced_at": datetime.utcnow(),
+        }).scalars().all()
+        db.commit()
+
+    return CheckInSyncResponse(
+        recorded=len(earliest) - len(revoked),
+        invalid=invalid,
+        revoked=sorted(revoked)
+    )
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import College, User
+from app.queries import username_exists
 from app.schemas import CollegeCreate, CollegeResponse, MessageResponse
 from app.dependencies import get_current_user
 from datetime import datetime
@@ -43,8 +44,7 @@ def create_college(
     
     # Check if college admin username already exists
     admin_username = f"admin.{college_data.code.lower()}"
-    existing_user = db.query(User).filter(User.username == admin_username).first()
-    if existing_user:
+    if username_exists(db, admin_username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Admin user for college code '{college_data.code}' already exists"
@@ -88,7 +88,7 @@ def list_colleges(
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get list of colleges (Public - for student registration)
@@ -99,19 +99,21 @@ def list_colleges(
         query = query.filter(College.is_active == True)
     
     colleges = query.offset(skip).limit(limit).all()
+    db.close()  # Release the connection before serialization
     return colleges
 
 
 @router.get("/{college_id}", response_model=CollegeResponse)
 def get_college(
     college_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific college by ID
     """
     college = db.query(College).filter(College.id == college_id).first()
+    db.close()  # Release the connection before serialization
     
     if not college:
         raise HTTPException(
@@ -1,15 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import heapq
+from contextlib import contextmanager
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 
-from app.database import get_db
-from app.models import User, Event
-from app.schemas import EventCreate, EventResponse, MessageResponse, EventUpdate
+from app.availability import hub, load_availability
+from app.config import settings
+from app.database import EXCLUSION_VIOLATION, get_db, get_read_db, pgcode
+from app.models import User, Event, EventTombstone
+from app.queries import get_event_by_id, lock_event_capacity
+from app.schemas import (
+    EventCreate,
+    EventResponse,
+    EventUpdate,
+    EventChangesResponse,
+    EventConflictsRequest,
+    EventConflict,
+    TrendingEventResponse,
+    MessageResponse,
+)
 from app.dependencies import get_current_user, get_current_admin_user
+from app.trending import get_ranking, record_registrations
+from app.waitlist import fill_open_seats
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
 
+def parse_sync_token(token: Optional[str]) -> Tuple[int, int]:
+    """
+    Decode a "<version>-<event_id>" sync token; no token means from the start
+    """
+    if not token:
+        return (0, 0)
+    try:
+        version, event_id = token.split("-")
+        return (int(version), int(event_id))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+
+
+def format_sync_token(position: Tuple[int, int]) -> str:
+    return f"{position[0]}-{position[1]}"
+
+
+@contextmanager
+def venue_conflict_as_409(db: Session):
+    """
+    Turn a venue overlap rejected by the database into a 409 response
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        db.rollback()
+        if pgcode(exc) == EXCLUSION_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Venue is already booked for an overlapping event"
+            )
+        raise
+
+
+# Proposed slots overlapping existing events or each other, in one statement;
+# existing events are matched through the venue/time exclusion index
+_find_conflicts = text("""
+    WITH proposed AS (
+        SELECT
+            idx,
+            lower(venue) AS venue_key,
+            CASE WHEN end_time IS NULL THEN tsrange(start_time, start_time, '[]')
+                 ELSE tsrange(start_time, end_time, '[)') END AS during
+        FROM unnest(
+            CAST(:indexes AS integer[]),
+            CAST(:venues AS text[]),
+            CAST(:start_times AS timestamp[]),
+            CAST(:end_times AS timestamp[])
+        ) AS p(idx, venue, start_time, end_time)
+    )
+    SELECT p.idx AS index, e.id AS event_id, NULL::integer AS conflicting_index
+    FROM proposed p
+    JOIN events e ON lower(e.venue) = p.venue_key AND e.during && p.during
+    UNION ALL
+    SELECT a.idx, NULL, b.idx
+    FROM proposed a
+    JOIN proposed b ON a.idx < b.idx AND a.venue_key = b.venue_key AND a.during && b.during
+    ORDER BY 1, 2, 3
+""")
+
+
 @router.post("", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 def create_event(
     event_data: EventCreate,
@@ -38,7 +123,8 @@ def create_event(
     )
     
     db.add(new_event)
-    db.commit()
+    with venue_conflict_as_409(db):
+        db.commit()
     db.refresh(new_event)
     
     return MessageResponse(
@@ -51,26 +137,194 @@ def create_event(
 def list_events(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     List all events
     """
     events = db.query(Event).order_by(Event.start_time).offset(skip).limit(limit).all()
+    db.close()  # Release the connection before serialization
     return events
 
 
+@router.get("/changes", response_model=EventChangesResponse)
+def list_event_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List events created, updated or deleted after a sync token.
+    Omit `since` for a full sync, then pass back `next_token`; keep paging
+    while `has_more` is true.
+    """
+    position = parse_sync_token(since)
+
+    # Every transaction below the snapshot xmin has finished, so no change
+    # can still appear behind this watermark. Read it before the changes.
+    watermark = db.execute(
+        text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+    ).scalar()
+
+    # Changed and deleted events in (version, id) order, one extra row to detect more pages
+    events = (
+        db.query(Event)
+        .filter(
+            tuple_(Event.sync_version, Event.id) > position,
+            Event.sync_version < watermark
+        )
+        .order_by(Event.sync_version, Event.id)
+        .limit(limit + 1)
+        .all()
+    )
+    tombstones = (
+        db.query(EventTombstone.sync_version, EventTombstone.event_id)
+        .filter(
+            tuple_(EventTombstone.sync_version, EventTombstone.event_id) > position,
+            EventTombstone.sync_version < watermark
+        )
+        .order_by(EventTombstone.sync_version, EventTombstone.event_id)
+        .limit(limit + 1)
+        .all()
+    )
+    db.close()  # Release the connection before serialization
+
+    changes = list(heapq.merge(
+        (((event.sync_version, event.id), event) for event in events),
+        (((row.sync_version, row.event_id), None) for row in tombstones),
+        key=lambda change: change[0]
+    ))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if has_more:
+        next_position = changes[-1][0]
+    else:
+        # Caught up: resume from the watermark
+        next_position = max(position, (watermark, 0))
+
+    return EventChangesResponse(
+        events=[event for _, event in changes if event is not None],
+        deleted=[event_id for (_, event_id), event in changes if event is None],
+        next_token=format_sync_token(next_position),
+        has_more=has_more
+    )
+
+
+@router.post("/conflicts", response_model=List[EventConflict])
+def find_event_conflicts(
+    conflicts_data: EventConflictsRequest,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Check a schedule before importing it (admin only).
+    Returns one entry per clash: the index of a proposed event and either the
+    existing event it overlaps or a later proposed event in the same venue.
+    """
+    slots = conflicts_data.events
+    for index, slot in enumerate(slots):
+        if slot.end_time and slot.end_time <= slot.start_time:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"End time must be after start time (event {index})"
+            )
+
+    rows = db.execute(_find_conflicts, {
+        "indexes": list(range(len(slots))),
+        "venues": [slot.venue for slot in slots],
+        "start_times": [slot.start_time for slot in slots],
+        "end_times": [slot.end_time for slot in slots],
+    }).mappings().all()
+    db.close()  # Release the connection before serialization
+
+    return [EventConflict(**row) for row in rows]
+
+
+@router.get("/trending", response_model=List[TrendingEventResponse])
+def list_trending_events(
+    limit: int = Query(10, ge=1, le=settings.TRENDING_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List upcoming events gaining registrations fastest, from the ranking
+    recomputed every TRENDING_RECOMPUTE_INTERVAL_SECONDS
+    """
+    return get_ranking(limit)
+
+
+@router.get("/availability/stream")
+async def stream_event_availability(
+    event_ids: List[int] = Query(..., min_length=1),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream seat availability for the given events as Server-Sent Events.
+    Sends the current values first, then an update whenever registered_count,
+    capacity or is_full changes, at most once per AVAILABILITY_FLUSH_INTERVAL_MS.
+    """
+    event_ids = list(dict.fromkeys(event_ids))
+    if len(event_ids) > settings.AVAILABILITY_MAX_EVENTS_PER_STREAM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.AVAILABILITY_MAX_EVENTS_PER_STREAM} events per stream"
+        )
+    if not settings.AVAILABILITY_STREAM_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Availability streaming is disabled"
+        )
+
+    # Check if the events exist
+    if not await run_in_threadpool(load_availability, event_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+
+    async def stream():
+        # Subscribe before reading the initial values so no change falls in between
+        queue = hub.subscribe(event_ids)
+        try:
+            initial = await run_in_threadpool(load_availability, event_ids)
+            for availability in initial.values():
+                yield f"event: availability\ndata: {availability.model_dump_json()}\n\n"
+
+            while True:
+                try:
+                    availability = await asyncio.wait_for(
+                        queue.get(), timeout=settings.AVAILABILITY_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing the connection and detects gone clients
+                    yield ": keep-alive\n\n"
+                    continue
+                if availability is None:
+                    break
+                yield f"event: availability\ndata: {availability.model_dump_json()}\n\n"
+        finally:
+            hub.unsubscribe(queue, event_ids)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{event_id}", response_model=EventResponse)
 def get_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific event by ID
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = get_event_by_id(db, event_id)
+    db.close()  # Release the connection before serialization
     
     if not event:
         raise HTTPException(
@@ -90,7 +344,7 @@ def delete_event(
     """
     Delete an event (admin only)
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = get_event_by_id(db, event_id)
     
     if not event:
         raise HTTPException(
@@ -117,7 +371,14 @@ def update_event(
     """
     Update an existing event (admin only)
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    # Registrations count seats under this lock, so a capacity change and
+    # the promotions it triggers cannot race them
+    if not lock_event_capacity(db, event_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    event = get_event_by_id(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -147,7 +408,12 @@ def update_event(
     if event_data.capacity is not None:
         event.capacity = event_data.capacity
 
-    db.commit()
+        # Fill any newly added seats from the waitlist, counted under the lock
+        promoted = fill_open_seats(db, event.id, event.capacity)
+        record_registrations(db, {event.id: len(promoted)})
+
+    with venue_conflict_as_409(db):
+        db.commit()
     db.refresh(event)
 
     return MessageResponse(
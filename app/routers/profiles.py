@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import List
+
+from app import profiling
+from app.models import User
+from app.schemas import ProfileInfo
+from app.dependencies import get_current_admin_user
+
+router = APIRouter(prefix="/profiles", tags=["Profiling"])
+
+
+@router.get("", response_model=List[ProfileInfo])
+def list_profiles(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    List stored request profiles, newest first (admin only)
+    """
+    return profiling.list_profiles()
+
+
+@router.get("/{profile_id}")
+def download_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Download a request profile in speedscope format (admin only).
+    Open it at https://www.speedscope.app
+    """
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 
-from app.database import get_db
-from app.models import User, Event, Registration
-from app.schemas import RegistrationResponse, RegistrationWithUser, MessageResponse
+from app.admission import admit_registration
+from app.database import get_db, get_read_db
+from app.models import User, Event, Registration, WaitlistEntry
+from app.queries import get_event_by_id, lock_event_capacity
+from app.tickets import issue_ticket
+from app.trending import record_registrations
+from app.waitlist import fill_open_seats, waitlist_position
+from app.schemas import (
+    RegistrationResponse,
+    RegistrationWithUser,
+    WaitlistResponse,
+    RegistrationBatchCreate,
+    RegistrationBatchResult,
+    RegistrationBatchResponse,
+    TicketResponse,
+    MessageResponse,
+)
 from app.dependencies import get_current_user, get_current_admin_user
 
 router = APIRouter(prefix="/registrations", tags=["Registrations"])
@@ -13,14 +28,19 @@ router = APIRouter(prefix="/registrations", tags=["Registrations"])
 @router.post("/events/{event_id}/register", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 def register_for_event(
     event_id: int,
+    response: Response,
+    admission: None = Depends(admit_registration),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Register current user for an event
+    Register current user for an event.
+    If the event is full the user joins its waitlist instead (202 Accepted).
+    During launches, requests over the event's admission limit get 429 with
+    a queue ticket to send back in the X-Admission-Ticket header.
     """
-    # Check if event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
+    # Check if event exists, locking it so capacity checks are serialized
+    event = lock_event_capacity(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,11 +59,30 @@ def register_for_event(
             detail="You are already registered for this event"
         )
     
-    # Check capacity
-    if event.is_full:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Event is full"
+    # Count seats only after the lock is held
+    registered_count = db.query(func.count(Registration.id)).filter(
+        Registration.event_id == event_id
+    ).scalar()
+
+    # Join the waitlist when the event is full
+    if event.capacity is not None and registered_count >= event.capacity:
+        entry = db.query(WaitlistEntry).filter(
+            WaitlistEntry.user_id == current_user.id,
+            WaitlistEntry.event_id == event_id
+        ).first()
+
+        if not entry:
+            entry = WaitlistEntry(user_id=current_user.id, event_id=event_id)
+            db.add(entry)
+            db.flush()  # Flush to get the queue ID
+
+        position = waitlist_position(db, entry)
+        db.commit()
+
+        response.status_code = status.HTTP_202_ACCEPTED
+        return MessageResponse(
+            message="Event is full, you have been added to the waitlist",
+            detail=f"Waitlist position: {position}"
         )
     
     # Create registration
@@ -53,6 +92,12 @@ def register_for_event(
     )
     
     db.add(new_registration)
+    # A queued user who got a seat directly leaves the waitlist
+    db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.event_id == event_id
+    ).delete(synchronize_session=False)
+    record_registrations(db, {event_id: 1})
     db.commit()
     db.refresh(new_registration)
     
@@ -62,6 +107,101 @@ def register_for_event(
     )
 
 
+@router.post("/batch", response_model=RegistrationBatchResponse)
+def register_for_events(
+    batch_data: RegistrationBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Register current user for several events in one transaction.
+
+    Events are locked in ascending ID order, so overlapping carts submitted
+    concurrently always queue on the same row first and cannot deadlock.
+    Each event gets its own outcome; events that cannot be joined do not
+    prevent the others from being registered.
+    """
+    # Keep the caller's order for the response, lock in ID order
+    requested_ids = list(dict.fromkeys(batch_data.event_ids))
+    locked_ids = sorted(requested_ids)
+
+    # Lock every requested event row in a single statement
+    capacities = dict(
+        db.query(Event.id, Event.capacity)
+        .filter(Event.id.in_(locked_ids))
+        .order_by(Event.id)
+        .with_for_update()
+        .all()
+    )
+
+    # Current registration counts for all requested events
+    registered_counts = dict(
+        db.query(Registration.event_id, func.count(Registration.id))
+        .filter(Registration.event_id.in_(locked_ids))
+        .group_by(Registration.event_id)
+        .all()
+    )
+
+    # Events the user has already joined
+    already_registered = {
+        event_id
+        for (event_id,) in db.query(Registration.event_id).filter(
+            Registration.user_id == current_user.id,
+            Registration.event_id.in_(locked_ids)
+        )
+    }
+
+    results = {}
+    new_registrations = {}
+    for event_id in requested_ids:
+        if event_id not in capacities:
+            results[event_id] = RegistrationBatchResult(
+                event_id=event_id, status="not_found", detail="Event not found"
+            )
+        elif event_id in already_registered:
+            results[event_id] = RegistrationBatchResult(
+                event_id=event_id,
+                status="already_registered",
+                detail="You are already registered for this event"
+            )
+        elif (
+            capacities[event_id] is not None
+            and registered_counts.get(event_id, 0) >= capacities[event_id]
+        ):
+            results[event_id] = RegistrationBatchResult(
+                event_id=event_id, status="full", detail="Event is full"
+            )
+        else:
+            new_registrations[event_id] = Registration(
+                user_id=current_user.id,
+                event_id=event_id
+            )
+
+    # Insert all accepted registrations together, leaving those events' waitlists
+    db.add_all(new_registrations.values())
+    if new_registrations:
+        db.query(WaitlistEntry).filter(
+            WaitlistEntry.user_id == current_user.id,
+            WaitlistEntry.event_id.in_(list(new_registrations))
+        ).delete(synchronize_session=False)
+    record_registrations(db, {event_id: 1 for event_id in new_registrations})
+    db.flush()  # Flush to get the registration IDs
+
+    for event_id, registration in new_registrations.items():
+        results[event_id] = RegistrationBatchResult(
+            event_id=event_id,
+            status="registered",
+            registration_id=registration.id
+        )
+
+    db.commit()
+
+    return RegistrationBatchResponse(
+        registered=len(new_registrations),
+        results=[results[event_id] for event_id in requested_ids]
+    )
+
+
 @router.delete("/events/{event_id}/register", response_model=MessageResponse)
 def unregister_from_event(
     event_id: int,
@@ -71,19 +211,33 @@ def unregister_from_event(
     """
     Unregister current user from an event
     """
+    # Lock the event first, so the freed seat goes to the waitlist and not
+    # to a direct registration racing this one
+    event = lock_event_capacity(db, event_id)
+
     # Find registration
     registration = db.query(Registration).filter(
         Registration.user_id == current_user.id,
         Registration.event_id == event_id
     ).first()
     
-    if not registration:
+    if not event or not registration:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Registration not found"
         )
     
     db.delete(registration)
+    # Leaving the event also gives up any place in its queue
+    db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.event_id == event_id
+    ).delete(synchronize_session=False)
+
+    # Hand the freed seat, and any other open seat, to the users in line
+    promoted = fill_open_seats(db, event_id, event.capacity)
+
+    record_registrations(db, {event_id: len(promoted) - 1})
     db.commit()
     
     return MessageResponse(
@@ -92,17 +246,105 @@ def unregister_from_event(
     )
 
 
+@router.get("/events/{event_id}/ticket", response_model=TicketResponse)
+def get_registration_ticket(
+    event_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a signed check-in ticket for the current user's registration,
+    to be shown as a QR code at the gate
+    """
+    registration = db.query(Registration).filter(
+        Registration.user_id == current_user.id,
+        Registration.event_id == event_id
+    ).first()
+    db.close()  # Release the connection before signing
+
+    if not registration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Registration not found"
+        )
+
+    return TicketResponse(
+        registration_id=registration.id,
+        event_id=event_id,
+        ticket=issue_ticket(registration.id, event_id, current_user.id)
+    )
+
+
+@router.get("/events/{event_id}/waitlist", response_model=WaitlistResponse)
+def get_waitlist_position(
+    event_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get current user's position on an event's waitlist
+    """
+    entry = db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.event_id == event_id
+    ).first()
+
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Waitlist entry not found"
+        )
+
+    position = waitlist_position(db, entry)
+    db.close()  # Release the connection before serialization
+
+    return WaitlistResponse(
+        event_id=event_id,
+        position=position,
+        joined_at=entry.joined_at
+    )
+
+
+@router.delete("/events/{event_id}/waitlist", response_model=MessageResponse)
+def leave_waitlist(
+    event_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Remove current user from an event's waitlist
+    """
+    entry = db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.event_id == event_id
+    ).first()
+
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Waitlist entry not found"
+        )
+
+    db.delete(entry)
+    db.commit()
+
+    return MessageResponse(
+        message="Successfully left the waitlist",
+        detail=f"Event ID: {event_id}"
+    )
+
+
 @router.get("/events/{event_id}/registrations", response_model=List[RegistrationWithUser])
 def get_event_registrations(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get all registrations for an event (admin or event creator only)
     """
     # Check if event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = get_event_by_id(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -116,17 +358,20 @@ def get_event_registrations(
             detail="You don't have permission to view registrations for this event"
         )
     
-    # Get registrations
-    registrations = db.query(Registration).filter(
+    # Get registrations with their users in the same query
+    registrations = db.query(Registration).options(
+        joinedload(Registration.user)
+    ).filter(
         Registration.event_id == event_id
     ).all()
+    db.close()  # Release the connection before serialization
     
     return registrations
 
 
 @router.get("/my-registrations", response_model=List[RegistrationResponse])
 def get_my_registrations(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -135,5 +380,6 @@ def get_my_registrations(
     registrations = db.query(Registration).filter(
         Registration.user_id == current_user.id
     ).all()
+    db.close()  # Release the connection before serialization
     
     return registrations
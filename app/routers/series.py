@@ -0,0 +1,274 @@
+from datetime import datetime, timedelta
+from itertools import islice
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.admission import admit_registration
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models import User, Event, EventSeries
+from app.recurrence import occurrence_index, occurrences, series_duration
+from app.schemas import (
+    EventSeriesCreate,
+    EventSeriesResponse,
+    EventUpdate,
+    SeriesOccurrence,
+    MessageResponse,
+)
+from app.dependencies import get_current_user, get_current_admin_user
+from app.routers.checkins import to_utc
+from app.routers.events import update_event, venue_conflict_as_409
+from app.routers.registrations import register_for_event
+
+router = APIRouter(prefix="/series", tags=["Event Series"])
+
+
+def get_series_or_404(db: Session, series_id: int) -> EventSeries:
+    series = db.query(EventSeries).filter(EventSeries.id == series_id).first()
+    if not series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Series not found"
+        )
+    return series
+
+
+def materialize_occurrence(db: Session, series: EventSeries, occurrence_start: datetime) -> int:
+    """
+    Return the event ID of a series occurrence, storing it as an event first
+    if needed. Concurrent callers for the same occurrence get the same row.
+    Nothing is committed here: the caller's registration or override commits
+    the new row, and if it fails the occurrence is rolled back with it.
+    """
+    # Check if the series actually has an occurrence at that time
+    if occurrence_index(series, occurrence_start) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Series has no occurrence at that time"
+        )
+
+    duration = series_duration(series)
+    stmt = insert(Event).values(
+        title=series.title,
+        description=series.description,
+        venue=series.venue,
+        start_time=occurrence_start,
+        end_time=occurrence_start + duration if duration else None,
+        capacity=series.capacity,
+        created_by=series.created_by,
+        series_id=series.id,
+        occurrence_start=occurrence_start
+    ).on_conflict_do_nothing(
+        index_elements=[Event.series_id, Event.occurrence_start]
+    ).returning(Event.id)
+
+    with venue_conflict_as_409(db):
+        event_id = db.execute(stmt).scalar()
+    if event_id is None:
+        event_id = db.query(Event.id).filter(
+            Event.series_id == series.id,
+            Event.occurrence_start == occurrence_start
+        ).scalar()
+    return event_id
+
+
+@router.post("", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+def create_series(
+    series_data: EventSeriesCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Create a recurring event series (admin only)
+    """
+    # Validate until if provided
+    if series_data.until and series_data.until < series_data.start_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Until must not be before start time"
+        )
+
+    new_series = EventSeries(**series_data.model_dump(), created_by=current_user.id)
+
+    db.add(new_series)
+    db.commit()
+    db.refresh(new_series)
+
+    return MessageResponse(
+        message="Series created successfully",
+        detail=f"Series ID: {new_series.id}"
+    )
+
+
+@router.get("", response_model=List[EventSeriesResponse])
+def list_series(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List all event series
+    """
+    series = db.query(EventSeries).order_by(EventSeries.id).offset(skip).limit(limit).all()
+    db.close()  # Release the connection before serialization
+    return series
+
+
+@router.get("/{series_id}", response_model=EventSeriesResponse)
+def get_series(
+    series_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a specific event series by ID
+    """
+    series = get_series_or_404(db, series_id)
+    db.close()  # Release the connection before serialization
+    return series
+
+
+@router.delete("/{series_id}", response_model=MessageResponse)
+def delete_series(
+    series_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Delete a series and its materialized occurrences (admin only)
+    """
+    series = get_series_or_404(db, series_id)
+
+    db.delete(series)
+    db.commit()
+
+    return MessageResponse(
+        message="Series deleted successfully",
+        detail=f"Series ID: {series_id}"
+    )
+
+
+@router.get("/{series_id}/occurrences", response_model=List[SeriesOccurrence])
+def list_occurrences(
+    series_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List occurrences overlapping [start, end), 30 days from now by default.
+    Occurrences with registrations or overrides carry their event ID and
+    current values; the rest are expanded from the series rule.
+    """
+    start = to_utc(start) if start else datetime.utcnow()
+    end = to_utc(end) if end else start + timedelta(days=30)
+    if end <= start or end - start > timedelta(days=settings.SERIES_MAX_WINDOW_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window must be positive and at most {settings.SERIES_MAX_WINDOW_DAYS} days"
+        )
+
+    series = get_series_or_404(db, series_id)
+    slots = list(islice(occurrences(series, start, end), settings.SERIES_MAX_OCCURRENCES))
+
+    # Materialized occurrences in the window, through the (series_id, occurrence_start) index
+    materialized = {}
+    if slots:
+        materialized = {
+            event.occurrence_start: event
+            for event in db.query(Event).filter(
+                Event.series_id == series_id,
+                Event.occurrence_start >= slots[0],
+                Event.occurrence_start <= slots[-1]
+            )
+        }
+    db.close()  # Release the connection before serialization
+
+    duration = series_duration(series)
+    results = []
+    for slot in slots:
+        event = materialized.get(slot)
+        if event is not None:
+            results.append(SeriesOccurrence(
+                series_id=series_id,
+                occurrence_start=slot,
+                event_id=event.id,
+                title=event.title,
+                description=event.description,
+                venue=event.venue,
+                start_time=event.start_time,
+                end_time=event.end_time,
+                capacity=event.capacity,
+                registered_count=event.registered_count,
+                is_full=event.is_full
+            ))
+        else:
+            results.append(SeriesOccurrence(
+                series_id=series_id,
+                occurrence_start=slot,
+                title=series.title,
+                description=series.description,
+                venue=series.venue,
+                start_time=slot,
+                end_time=slot + duration if duration else None,
+                capacity=series.capacity
+            ))
+
+    return results
+
+
+@router.post(
+    "/{series_id}/occurrences/{occurrence_start}/register",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED
+)
+def register_for_occurrence(
+    series_id: int,
+    occurrence_start: datetime,
+    response: Response,
+    admission: None = Depends(admit_registration),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Register current user for one occurrence of a series, storing the
+    occurrence as an event on its first registration.
+    Admission is gated per occurrence, before the series is looked up, so
+    callers over the limit get 429 without touching the database.
+    """
+    series = get_series_or_404(db, series_id)
+    event_id = materialize_occurrence(db, series, to_utc(occurrence_start))
+
+    return register_for_event(
+        event_id=event_id,
+        response=response,
+        admission=None,
+        db=db,
+        current_user=current_user
+    )
+
+
+@router.put("/{series_id}/occurrences/{occurrence_start}", response_model=MessageResponse)
+def override_occurrence(
+    series_id: int,
+    occurrence_start: datetime,
+    event_data: EventUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Change a single occurrence of a series, e.g. a different venue or time (admin only)
+    """
+    series = get_series_or_404(db, series_id)
+    event_id = materialize_occurrence(db, series, to_utc(occurrence_start))
+
+    return update_event(
+        event_id=event_id,
+        event_data=event_data,
+        db=db,
+        current_user=current_user
+    )
@@ -0,0 +1,141 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.config import settings
+from app.database import engine, get_read_db
+from app.models import User
+from app.schemas import (
+    StatsResponse,
+    UserStats,
+    CollegeBranchStats,
+    EventFillStats,
+    EventDailyFill,
+    MessageResponse,
+)
+from app.dependencies import get_current_admin_user
+
+router = APIRouter(prefix="/stats", tags=["Statistics"])
+
+# Refreshed in this order; all are maintained by migrations
+STATS_VIEWS = [
+    "mv_user_stats",
+    "mv_college_branch_stats",
+    "mv_event_registration_stats",
+    "mv_event_daily_fill",
+]
+
+# Advisory lock key so only one worker refreshes at a time
+STATS_REFRESH_LOCK_KEY = 730_331
+
+
+def refresh_stats() -> bool:
+    """
+    Refresh every stats view CONCURRENTLY, so readers keep seeing the previous
+    snapshot and base tables are never locked against writes.
+    Returns False if another worker is already refreshing.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": STATS_REFRESH_LOCK_KEY}
+        ).scalar()
+        if not acquired:
+            return False
+
+        # Refreshes outlive the per-request statement timeout
+        conn.exec_driver_sql(f"SET statement_timeout = {int(settings.STATS_REFRESH_TIMEOUT_MS)}")
+        conn.info["reset_statement_timeout"] = True
+        try:
+            for view in STATS_VIEWS:
+                conn.exec_driver_sql(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": STATS_REFRESH_LOCK_KEY})
+        return True
+
+
+@router.get("", response_model=StatsResponse)
+def get_stats(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get user and student statistics (admin only)
+    """
+    users = db.execute(text(
+        "SELECT refreshed_at, total_users, active_users, inactive_users, admin_users "
+        "FROM mv_user_stats"
+    )).mappings().one()
+
+    colleges = db.execute(text(
+        "SELECT college_id, college_name, branch, student_count "
+        "FROM mv_college_branch_stats ORDER BY college_id, branch"
+    )).mappings().all()
+    db.close()  # Release the connection before serialization
+
+    return StatsResponse(
+        refreshed_at=users["refreshed_at"],
+        users=UserStats(**users),
+        colleges=[CollegeBranchStats(**row) for row in colleges]
+    )
+
+
+@router.get("/events", response_model=List[EventFillStats])
+def get_event_stats(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get registrations and fill rate per event, fullest first (admin only)
+    """
+    rows = db.execute(
+        text(
+            "SELECT event_id, title, start_time, capacity, registered_count, fill_rate "
+            "FROM mv_event_registration_stats "
+            "ORDER BY fill_rate DESC NULLS LAST, registered_count DESC, event_id "
+            "OFFSET :skip LIMIT :limit"
+        ),
+        {"skip": skip, "limit": limit}
+    ).mappings().all()
+    db.close()  # Release the connection before serialization
+
+    return [EventFillStats(**row) for row in rows]
+
+
+@router.get("/events/{event_id}/fill", response_model=List[EventDailyFill])
+def get_event_fill_history(
+    event_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get daily registrations and cumulative fill rate for an event (admin only)
+    """
+    rows = db.execute(
+        text(
+            "SELECT day, registrations, cumulative_registrations, fill_rate "
+            "FROM mv_event_daily_fill WHERE event_id = :event_id ORDER BY day"
+        ),
+        {"event_id": event_id}
+    ).mappings().all()
+    db.close()  # Release the connection before serialization
+
+    return [EventDailyFill(**row) for row in rows]
+
+
+@router.post("/refresh", response_model=MessageResponse)
+def trigger_stats_refresh(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Refresh statistics now instead of waiting for the next scheduled run (admin only)
+    """
+    if not refresh_stats():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A statistics refresh is already running"
+        )
+
+    return MessageResponse(message="Statistics refreshed successfully")
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User
+from app.queries import get_user_by_id, username_exists
 from app.schemas import UserCreate, UserResponse, MessageResponse
 from app.dependencies import get_current_user
 
@@ -31,8 +32,7 @@ def create_user(
     Create a new user (Public registration - requires admin approval to become active)
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
-    if existing_user:
+    if username_exists(db, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"User with username '{user_data.username}' already exists"
@@ -60,7 +60,7 @@ def list_users(
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_admin)
 ):
     """
@@ -71,20 +71,23 @@ def list_users(
     if active_only:
         query = query.filter(User.is_active == True)
     
-    users = query.offset(skip).limit(limit).all()
+    # Order by ID so pages are stable and read through the primary key
+    users = query.order_by(User.id).offset(skip).limit(limit).all()
+    db.close()  # Release the connection before serialization
     return users
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_admin)
 ):
     """
     Get a specific user by ID (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(db, user_id)
+    db.close()  # Release the connection before serialization
     
     if not user:
         raise HTTPException(
@@ -104,7 +107,7 @@ def activate_user(
     """
     Activate a user (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -128,7 +131,7 @@ def deactivate_user(
     """
     Deactivate a user (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -159,7 +162,7 @@ def delete_user(
     """
     Delete a user (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_by_id(db, user_id)
     
     if not user:
         raise HTTPException(
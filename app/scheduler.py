@@ -0,0 +1,55 @@
+"""
+Periodic background jobs run for the lifetime of the application.
+
+Jobs are plain synchronous functions registered with `add_job`; the lifespan
+in app.main starts one asyncio task per job, and each run is pushed to the
+threadpool so blocking database work never stalls the event loop.
+"""
+import asyncio
+import logging
+from typing import Callable, List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+_jobs: List[Tuple[str, float, Callable[[], object]]] = []
+
+
+def add_job(name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+    """
+    Run `func` every `interval_seconds`; a non-positive interval disables the job
+    """
+    if interval_seconds > 0:
+        _jobs.append((name, interval_seconds, func))
+
+
+async def _run_periodically(name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(func)
+        except Exception:
+            logger.exception("Scheduled job %s failed", name)
+            metrics.increment("scheduled_job_failures_total", job=name)
+
+
+def start() -> List[asyncio.Task]:
+    """
+    Start every registered job on the running event loop
+    """
+    return [
+        asyncio.create_task(_run_periodically(name, interval, func), name=f"job:{name}")
+        for name, interval, func in _jobs
+    ]
+
+
+async def stop(tasks: List[asyncio.Task]) -> None:
+    """
+    Cancel running jobs and wait for them to finish
+    """
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
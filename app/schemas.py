@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 
 
 # ============================================
@@ -126,12 +126,92 @@ class EventResponse(EventBase):
     id: int
     created_by: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
     registered_count: int
     is_full: bool
     
     model_config = ConfigDict(from_attributes=True)
 
 
+class EventSlot(BaseModel):
+    venue: str = Field(..., min_length=1)
+    start_time: datetime
+    end_time: Optional[datetime] = None
+
+
+class EventConflictsRequest(BaseModel):
+    events: List[EventSlot] = Field(..., min_length=1, max_length=1000)
+
+
+class EventConflict(BaseModel):
+    index: int
+    event_id: Optional[int] = None
+    conflicting_index: Optional[int] = None
+
+
+class EventChangesResponse(BaseModel):
+    events: List[EventResponse]
+    deleted: List[int]
+    next_token: str
+    has_more: bool
+
+
+class EventAvailability(BaseModel):
+    event_id: int
+    capacity: Optional[int] = None
+    registered_count: int
+    is_full: bool
+
+
+class TrendingEventResponse(BaseModel):
+    event: EventResponse
+    score: float
+    recent_registrations: int
+
+
+# ============================================
+# EVENT SERIES SCHEMAS
+# ============================================
+
+class EventSeriesBase(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    venue: Optional[str] = None
+    capacity: Optional[int] = Field(None, ge=1)
+    start_time: datetime
+    duration_minutes: Optional[int] = Field(None, ge=1)
+    frequency: Literal["daily", "weekly", "monthly"]
+    interval: int = Field(1, ge=1, le=366)
+    count: Optional[int] = Field(None, ge=1)
+    until: Optional[datetime] = None
+
+
+class EventSeriesCreate(EventSeriesBase):
+    pass
+
+
+class EventSeriesResponse(EventSeriesBase):
+    id: int
+    created_by: int
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SeriesOccurrence(BaseModel):
+    series_id: int
+    occurrence_start: datetime
+    event_id: Optional[int] = None
+    title: str
+    description: Optional[str] = None
+    venue: Optional[str] = None
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    capacity: Optional[int] = None
+    registered_count: int = 0
+    is_full: bool = False
+
+
 # ============================================
 # REGISTRATION SCHEMAS
 # ============================================
@@ -159,6 +239,117 @@ class RegistrationWithUser(RegistrationResponse):
     model_config = ConfigDict(from_attributes=True)
 
 
+class WaitlistResponse(BaseModel):
+    event_id: int
+    position: int
+    joined_at: datetime
+
+
+class RegistrationBatchCreate(BaseModel):
+    event_ids: List[int] = Field(..., min_length=1, max_length=50)
+
+
+class RegistrationBatchResult(BaseModel):
+    event_id: int
+    status: Literal["registered", "already_registered", "full", "not_found"]
+    registration_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class RegistrationBatchResponse(BaseModel):
+    registered: int
+    results: List[RegistrationBatchResult]
+
+
+# ============================================
+# CHECK-IN SCHEMAS
+# ============================================
+
+class TicketResponse(BaseModel):
+    registration_id: int
+    event_id: int
+    ticket: str
+
+
+class TicketPublicKeyResponse(BaseModel):
+    algorithm: str = "Ed25519"
+    key_id: str
+    public_key: str
+
+
+class CheckInScan(BaseModel):
+    ticket: str = Field(..., max_length=200)
+    scanned_at: datetime
+
+
+class CheckInSyncRequest(BaseModel):
+    scanner_id: Optional[str] = Field(None, max_length=100)
+    scans: List[CheckInScan] = Field(..., min_length=1)
+
+
+class CheckInSyncResponse(BaseModel):
+    recorded: int
+    invalid: List[int]
+    revoked: List[int]
+
+
+# ============================================
+# PROFILING SCHEMAS
+# ============================================
+
+class ProfileInfo(BaseModel):
+    id: str
+    trigger: str
+    method: str
+    path: str
+    route: str
+    status: int
+    duration_ms: float
+    samples: int
+    peak_concurrent_requests: int
+    created_at: datetime
+
+
+# ============================================
+# STATS SCHEMAS
+# ============================================
+
+class UserStats(BaseModel):
+    total_users: int
+    active_users: int
+    inactive_users: int
+    admin_users: int
+
+
+class CollegeBranchStats(BaseModel):
+    college_id: int
+    college_name: str
+    branch: str
+    student_count: int
+
+
+class StatsResponse(BaseModel):
+    refreshed_at: datetime
+    users: UserStats
+    colleges: List[CollegeBranchStats]
+
+
+class EventFillStats(BaseModel):
+    event_id: int
+    title: str
+    start_time: datetime
+    capacity: Optional[int] = None
+    registered_count: int
+    fill_rate: Optional[float] = None
+
+
+class EventDailyFill(BaseModel):
+    day: date
+    registrations: int
+    cumulative_registrations: int
+    fill_rate: Optional[float] = None
+
+
 # ============================================
 # RESPONSE MESSAGES
 # ============================================
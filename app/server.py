@@ -0,0 +1,175 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    python -m app.server
+
+Starts SERVER_WORKERS worker processes (one per CPU core by default) on
+uvloop and httptools. The app is imported once in the master and the workers
+are forked from it, so they share its memory and start quickly. Each worker
+still gets its own connection pool, log writer, loop monitor, background jobs
+and warm-up, as those start in the app's lifespan.
+
+With DB_CONNECTION_BUDGET set, the pool of each worker is sized so that all
+workers together never open more connections than the budget. DB_POOL_SIZE
+is kept if it fits, and the rest of each worker's share becomes overflow.
+
+On SIGTERM a worker drains. /ready turns 503 and availability streams end so
+their clients reconnect elsewhere, and uvicorn stops accepting connections.
+In-flight requests, such as registrations, get SERVER_GRACEFUL_TIMEOUT_SECONDS
+to finish before they are cancelled and the lifespan shuts down.
+
+Needs the "server" extra: pip install -e ".[server]"
+"""
+import asyncio
+import logging
+import os
+import sys
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.arbiter import Arbiter
+    from uvicorn import Server
+    from uvicorn_worker import UvicornWorker
+except ImportError as exc:
+    raise SystemExit(f'python -m app.server needs the "server" extra: pip install -e ".[server]" ({exc})')
+
+# Only settings at import: the pools must be sized before app.database creates the engine
+from app.config import settings
+
+# Named explicitly, as this module usually runs as __main__
+logger = logging.getLogger("app.server")
+
+# Time on top of the drain for the lifespan shutdown (the availability
+# listener can take a few seconds to stop) before gunicorn kills a worker
+SHUTDOWN_MARGIN_SECONDS = 10
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    # CPUs this process may run on, which in a container can be fewer than the host's
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def size_pools(workers: int) -> None:
+    """
+    Fit every worker's pool into DB_CONNECTION_BUDGET
+    """
+    if settings.DB_CONNECTION_BUDGET <= 0:
+        return
+
+    per_worker = settings.DB_CONNECTION_BUDGET // workers
+    if settings.AVAILABILITY_STREAM_ENABLED:
+        per_worker -= 1  # The availability listener's own connection
+    if per_worker < 1:
+        raise SystemExit(
+            f"DB_CONNECTION_BUDGET={settings.DB_CONNECTION_BUDGET} leaves no pooled connections "
+            f"for {workers} workers"
+        )
+    settings.DB_POOL_SIZE = min(settings.DB_POOL_SIZE, per_worker)
+    settings.DB_MAX_OVERFLOW = per_worker - settings.DB_POOL_SIZE
+
+
+def begin_drain() -> None:
+    """
+    Stop advertising this worker and end its long-lived streams
+    """
+    from app import warmup
+    from app.availability import hub as availability_hub
+
+    warmup.state.ready = False
+    availability_hub.end_streams()
+    logger.info("Draining worker %d", os.getpid())
+
+
+class DrainingServer(Server):
+    """
+    Uvicorn server that starts draining as soon as it is told to exit
+    """
+
+    async def serve(self, sockets=None) -> None:
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets)
+
+    def handle_exit(self, sig, frame) -> None:
+        # Called from the signal handler, so hand the work to the loop
+        if not self.should_exit:
+            self._loop.call_soon_threadsafe(begin_drain)
+        super().handle_exit(sig, frame)
+
+
+class Worker(UvicornWorker):
+    """
+    Uvicorn worker on uvloop and httptools with a graceful drain
+    """
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # UvicornWorker hands uvicorn's loggers to gunicorn; keep them on the log queue
+        for name in ("uvicorn.error", "uvicorn.access"):
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers.clear()
+            uvicorn_logger.propagate = True
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def post_fork(server, worker) -> None:
+    from app.database import engine
+
+    # Connections inherited from the master must not be shared with it
+    engine.dispose(close=False)
+
+
+class Application(BaseApplication):
+    """
+    Gunicorn configured from Settings instead of a config file
+    """
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        # Build the OpenAPI document, and with it FastAPI's per-route state,
+        # once in the master; otherwise each worker's first request builds
+        # them on its event loop
+        app.openapi()
+        return app
+
+
+def main() -> None:
+    workers = worker_count()
+    size_pools(workers)
+    Application({
+        "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+        "workers": workers,
+        "worker_class": f"{__name__}.Worker",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS + SHUTDOWN_MARGIN_SECONDS,
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "loglevel": settings.LOG_LEVEL.lower(),
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Single-flight coalescing for identical concurrent GET requests.
+
+While a request to a configured read route is in flight, identical requests
+(same path, query string and visibility scope) wait for it instead of running
+the route themselves, then replay its status, headers and serialized body.
+Only requests arriving during the computation are coalesced; nothing is
+cached once the first response has been sent.
+
+The visibility scope comes from the verified JWT role, so callers only share
+responses with callers that would have been allowed to see the same data.
+Followers still look their user up, as get_current_user would, and run the
+route themselves if the user is gone or their role has changed. Only 2xx
+responses are shared; any other outcome is computed by each caller. Routes
+whose output depends on who is asking (e.g. /registrations/my-registrations)
+must not be configured.
+"""
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
+
+import anyio.to_thread
+from fastapi import HTTPException
+
+from app import logs, metrics
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.dependencies import verify_token
+from app.queries import get_user_by_id
+
+# (status, headers, body) of a completed response
+Result = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+Key = Tuple[str, bytes, str]
+
+_in_flight: Dict[Key, "asyncio.Future[Optional[Result]]"] = {}
+_counts = {"leader": 0, "coalesced": 0}
+
+
+def request_scope(headers: List[Tuple[bytes, bytes]]) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Visibility scope and user id of a request, or None if its token does not verify
+    """
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                token_data = verify_token(token)
+            except HTTPException:
+                return None
+            return "admin" if token_data.is_admin else "user", token_data.user_id
+    return "anonymous", None
+
+
+def user_matches(user_id: int, visibility: str) -> bool:
+    """
+    Whether the token's user still exists with the role its scope was derived from
+    """
+    with ReadSessionLocal() as db:
+        user = get_user_by_id(db, user_id)
+    return user is not None and user.is_admin == (visibility == "admin")
+
+
+def coalescing_ratio() -> float:
+    """
+    Share of eligible requests served from another request's computation
+    """
+    total = _counts["leader"] + _counts["coalesced"]
+    return _counts["coalesced"] / total if total else 0.0
+
+
+class SingleFlightMiddleware:
+    """
+    Shares one in-flight computation between identical concurrent GETs
+    """
+
+    def __init__(self, app):
+        self.app = app
+        prefix = re.escape(settings.API_V1_PREFIX)
+        self.routes = [re.compile(prefix + pattern) for pattern in settings.single_flight_routes]
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.SINGLE_FLIGHT_ENABLED
+            or scope["method"] != "GET"
+            or not any(route.fullmatch(scope["path"]) for route in self.routes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        caller = request_scope(scope["headers"])
+        if caller is None:
+            await self.app(scope, receive, send)
+            return
+        visibility, user_id = caller
+
+        key = (scope["path"], scope["query_string"], visibility)
+        leader = _in_flight.get(key)
+        if leader is not None:
+            if user_id is not None:
+                # The lookup get_current_user would have done for this caller
+                if not await anyio.to_thread.run_sync(user_matches, user_id, visibility):
+                    await self.app(scope, receive, send)
+                    return
+                logs.set_user(user_id)
+            result = await asyncio.shield(leader)
+            if result is not None:
+                _counts["coalesced"] += 1
+                metrics.increment("single_flight_requests_total", outcome="coalesced")
+                await self._replay(result, send)
+                return
+            # The leader failed or was refused; compute this response independently
+            await self.app(scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[key] = future
+        _counts["leader"] += 1
+        metrics.increment("single_flight_requests_total", outcome="leader")
+
+        status_code = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        body = []
+
+        async def capture(message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+            await send(message)
+
+        result = None
+        try:
+            await self.app(scope, receive, capture)
+            # Errors such as a 401 for a deleted user belong to the leader alone
+            if 200 <= status_code < 300:
+                result = (status_code, headers, b"".join(body))
+        finally:
+            del _in_flight[key]
+            future.set_result(result)
+
+    async def _replay(self, result: Result, send) -> None:
+        status_code, headers, body = result
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+metrics.register_gauge("single_flight_in_flight", lambda: len(_in_flight))
+metrics.register_gauge("single_flight_coalescing_ratio", coalescing_ratio)
@@ -0,0 +1,97 @@
+"""
+Compact signed check-in tickets.
+
+A ticket is a fixed binary payload (version, registration, event, user,
+issue time) followed by its Ed25519 signature, base64url encoded: about 110
+characters, small enough for a low-density QR code. Gate scanners fetch the
+public key once and verify tickets offline; only the server can sign.
+
+The signing key is TICKET_SIGNING_KEY (base64 32-byte seed) when set,
+otherwise it is derived from SECRET_KEY so existing deployments need no
+new secret.
+"""
+import base64
+import hashlib
+import struct
+import time
+from typing import NamedTuple, Optional
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from app.config import settings
+
+TICKET_VERSION = 1
+# version, registration_id, event_id, user_id, issued_at
+_payload = struct.Struct(">BIIII")
+SIGNATURE_SIZE = 64
+
+
+class TicketClaims(NamedTuple):
+    registration_id: int
+    event_id: int
+    user_id: int
+    issued_at: int
+
+
+def _load_signing_key() -> Ed25519PrivateKey:
+    if settings.TICKET_SIGNING_KEY:
+        seed = base64.urlsafe_b64decode(settings.TICKET_SIGNING_KEY + "=" * (-len(settings.TICKET_SIGNING_KEY) % 4))
+    else:
+        seed = hashlib.sha256(b"event-ticket-signing:" + settings.SECRET_KEY.encode("utf-8")).digest()
+    return Ed25519PrivateKey.from_private_bytes(seed)
+
+
+_signing_key = _load_signing_key()
+_verify_key = _signing_key.public_key()
+
+public_key_bytes = _verify_key.public_bytes(Encoding.Raw, PublicFormat.Raw)
+# Lets scanners notice a key rotation
+key_id = hashlib.sha256(public_key_bytes).hexdigest()[:16]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def issue_ticket(registration_id: int, event_id: int, user_id: int) -> str:
+    """
+    Sign a ticket for a registration
+    """
+    payload = _payload.pack(TICKET_VERSION, registration_id, event_id, user_id, int(time.time()))
+    return _b64encode(payload + _signing_key.sign(payload))
+
+
+def verify_ticket(ticket: str) -> Optional[TicketClaims]:
+    """
+    Return the claims of a validly signed ticket, or None
+    """
+    try:
+        raw = _b64decode(ticket)
+    except ValueError:
+        return None
+    if len(raw) != _payload.size + SIGNATURE_SIZE:
+        return None
+
+    payload, signature = raw[:_payload.size], raw[_payload.size:]
+    try:
+        _verify_key.verify(signature, payload)
+    except InvalidSignature:
+        return None
+
+    version, registration_id, event_id, user_id, issued_at = _payload.unpack(payload)
+    if version != TICKET_VERSION:
+        return None
+    return TicketClaims(registration_id, event_id, user_id, issued_at)
+
+
+def public_key() -> str:
+    """
+    Base64url raw Ed25519 public key for offline verification
+    """
+    return _b64encode(public_key_bytes)
@@ -0,0 +1,136 @@
+"""
+Trending events ranked by recent registration velocity.
+
+Register and unregister add their net change to an hourly counter per event
+(`event_registration_buckets`) inside the same transaction, so the counters
+never drift from the registrations table. A scheduled job scores events from
+the buckets in the trending window, weighting each hour by an exponential
+decay, and keeps the top events in memory; the trending route only slices
+that snapshot and never aggregates registrations per request.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import ReadSessionLocal, SessionLocal
+from app.models import Event, EventRegistrationBucket
+from app.schemas import EventResponse, TrendingEventResponse
+
+_lock = threading.Lock()
+_ranking: Optional[List[TrendingEventResponse]] = None
+
+
+def current_bucket() -> datetime:
+    """
+    Start of the current hourly bucket (UTC, matching registered_at)
+    """
+    return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+def record_registrations(db: Session, changes: Dict[int, int]) -> None:
+    """
+    Add net registration changes per event to the current bucket, within the
+    caller's transaction. Rows are upserted in event ID order so concurrent
+    batches touching the same events cannot deadlock.
+    """
+    changes = {event_id: delta for event_id, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    bucket_start = current_bucket()
+    stmt = insert(EventRegistrationBucket).values([
+        {"event_id": event_id, "bucket_start": bucket_start, "registrations": delta}
+        for event_id, delta in sorted(changes.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EventRegistrationBucket.event_id, EventRegistrationBucket.bucket_start],
+        set_={"registrations": EventRegistrationBucket.registrations + stmt.excluded.registrations}
+    )
+    db.execute(stmt)
+
+
+def recompute_ranking() -> List[TrendingEventResponse]:
+    """
+    Score upcoming and ongoing events from their recent buckets and replace
+    the in-memory ranking. Buckets older than the window are pruned.
+    """
+    global _ranking
+
+    now = datetime.utcnow()
+    window_start = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    age_hours = func.extract("epoch", now - EventRegistrationBucket.bucket_start) / 3600
+    weight = func.power(0.5, age_hours / settings.TRENDING_HALF_LIFE_HOURS)
+    score = func.sum(EventRegistrationBucket.registrations * weight).label("score")
+    recent = func.sum(EventRegistrationBucket.registrations).label("recent")
+
+    db = ReadSessionLocal()
+    try:
+        scored = (
+            db.query(EventRegistrationBucket.event_id, score, recent)
+            .join(Event, Event.id == EventRegistrationBucket.event_id)
+            .filter(
+                EventRegistrationBucket.bucket_start >= window_start,
+                or_(
+                    Event.end_time >= now,
+                    and_(Event.end_time.is_(None), Event.start_time >= now)
+                )
+            )
+            .group_by(EventRegistrationBucket.event_id)
+            .having(score > 0)
+            .order_by(score.desc(), EventRegistrationBucket.event_id)
+            .limit(settings.TRENDING_SIZE)
+            .all()
+        )
+
+        events = {
+            event.id: event
+            for event in db.query(Event).filter(Event.id.in_([row.event_id for row in scored]))
+        }
+        ranking = [
+            TrendingEventResponse(
+                event=EventResponse.model_validate(events[row.event_id]),
+                score=round(float(row.score), 3),
+                recent_registrations=row.recent
+            )
+            for row in scored
+            if row.event_id in events
+        ]
+    finally:
+        db.close()
+
+    with _lock:
+        _ranking = ranking
+
+    prune_buckets(window_start)
+    return ranking
+
+
+def prune_buckets(before: datetime) -> None:
+    """
+    Delete buckets that have aged out of the trending window
+    """
+    db = SessionLocal()
+    try:
+        db.query(EventRegistrationBucket).filter(
+            EventRegistrationBucket.bucket_start < before
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def get_ranking(limit: int) -> List[TrendingEventResponse]:
+    """
+    Top trending events from the last computed ranking, computing it on
+    first use if the scheduled job has not run yet
+    """
+    with _lock:
+        ranking = _ranking
+    if ranking is None:
+        ranking = recompute_ranking()
+    return ranking[:limit]
@@ -0,0 +1,73 @@
+"""
+Event waitlists: queue positions and promotion into freed seats.
+
+Promotion must run with the event row locked (`queries.lock_event_capacity`),
+the same lock registrations take before counting seats, so a direct
+registrant can never fill a seat that is being handed to the queue.
+"""
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Registration, WaitlistEntry
+
+
+def waitlist_position(db: Session, entry: WaitlistEntry) -> int:
+    """
+    Return the 1-based queue position of a waitlist entry
+    """
+    return db.query(func.count(WaitlistEntry.id)).filter(
+        WaitlistEntry.event_id == entry.event_id,
+        WaitlistEntry.id <= entry.id
+    ).scalar()
+
+
+def promote_from_waitlist(db: Session, event_id: int, seats: int = 1) -> List[Registration]:
+    """
+    Move up to `seats` users from the head of an event's waitlist into
+    registrations, within the caller's transaction.
+
+    Queue heads are claimed with FOR UPDATE SKIP LOCKED, so an entry being
+    removed by its user (leaving the waitlist) does not hold up promotion.
+    Entries of users who already hold a registration are skipped, so nobody
+    is promoted into a second seat.
+    """
+    already_registered = db.query(Registration.id).filter(
+        Registration.user_id == WaitlistEntry.user_id,
+        Registration.event_id == WaitlistEntry.event_id
+    ).exists()
+    heads = (
+        db.query(WaitlistEntry)
+        .filter(WaitlistEntry.event_id == event_id, ~already_registered)
+        .order_by(WaitlistEntry.id)
+        .limit(seats)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    promoted = []
+    for entry in heads:
+        registration = Registration(user_id=entry.user_id, event_id=event_id)
+        db.add(registration)
+        db.delete(entry)
+        promoted.append(registration)
+
+    return promoted
+
+
+def fill_open_seats(db: Session, event_id: int, capacity: Optional[int]) -> List[Registration]:
+    """
+    Promote waitlisted users into every seat that is free right now.
+    The caller must hold the event row lock.
+    """
+    if capacity is None:
+        return []
+
+    db.flush()  # Count pending cancellations
+    registered_count = db.query(func.count(Registration.id)).filter(
+        Registration.event_id == event_id
+    ).scalar()
+    if registered_count >= capacity:
+        return []
+    return promote_from_waitlist(db, event_id, seats=capacity - registered_count)
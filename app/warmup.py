@@ -0,0 +1,162 @@
+"""
+Startup warm-up.
+
+A fresh worker pays one-off costs on its first requests: the pool opens its
+connections, the OpenAPI document is built on the first /docs visit,
+SQLAlchemy compiles each statement the first time it runs, and the first
+request through the app builds the middleware stack and warms every layer on
+its way to the route. `run` pays them up front, in the background after
+startup, and the worker only reports ready on /ready once it is done:
+
+- pool: opens WARMUP_POOL_CONNECTIONS connections at once
+- statements: runs the pre-built lookups in app.queries
+- openapi: builds the OpenAPI document
+- bcrypt: hashes one password
+- routes: sends an in-process GET, as the first active admin, to each of
+  WARMUP_PATHS, which also exercises their response serializers
+
+A failing step is logged and skipped, since warm-up only makes the first
+requests faster and must never keep a worker out of rotation.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
+import anyio.to_thread
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import ReadSessionLocal, SessionLocal, engine
+from app.dependencies import create_access_token
+from app.models import User
+from app.queries import get_event_by_id, get_user_by_id, get_user_by_username, lock_event_capacity, username_exists
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """
+    Whether this worker has finished warming up, and how long each step took
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.timings_ms: Dict[str, float] = {}
+
+
+state = WarmupState()
+
+
+def warm_pool() -> None:
+    connections = []
+    try:
+        for _ in range(min(settings.WARMUP_POOL_CONNECTIONS, settings.DB_POOL_SIZE)):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_statements() -> None:
+    with ReadSessionLocal() as db:
+        get_user_by_id(db, 0)
+        get_user_by_username(db, "")
+        username_exists(db, "")
+        get_event_by_id(db, 0)
+    with SessionLocal() as db:
+        lock_event_capacity(db, 0)
+        db.rollback()
+
+
+def warm_bcrypt() -> None:
+    User().set_password("warm-up")
+
+
+def admin_headers() -> List[Tuple[bytes, bytes]]:
+    """
+    Authorization header for the first active admin, if there is one
+    """
+    with ReadSessionLocal() as db:
+        admin_id = db.execute(
+            select(User.id).where(User.is_admin, User.is_active).order_by(User.id).limit(1)
+        ).scalar()
+    if admin_id is None:
+        return []
+    token = create_access_token({"sub": str(admin_id), "is_admin": True})
+    return [(b"authorization", f"Bearer {token}".encode())]
+
+
+async def get(app, path: str, headers: List[Tuple[bytes, bytes]]) -> int:
+    """
+    Send a GET through the whole ASGI app and return the status code
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("warmup", 0),
+        "server": ("warmup", 80),
+    }
+    status_code = 500
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            await asyncio.Event().wait()  # Never disconnects
+        request_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def warm_routes(app) -> None:
+    headers = await anyio.to_thread.run_sync(admin_headers)
+    for path in settings.warmup_paths:
+        status_code = await get(app, settings.API_V1_PREFIX + path, headers)
+        if status_code >= 400:
+            logger.warning("Warm-up request to %s returned %d", path, status_code)
+
+
+async def _step(name: str, func: Callable) -> None:
+    started = time.perf_counter()
+    try:
+        await func()
+    except Exception:
+        logger.warning("Warm-up step %s failed", name, exc_info=True)
+    state.timings_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def run(app) -> None:
+    """
+    Warm this worker up, then mark it ready
+    """
+    if settings.WARMUP_ENABLED:
+        started = time.perf_counter()
+        await _step("pool", lambda: anyio.to_thread.run_sync(warm_pool))
+        await _step("statements", lambda: anyio.to_thread.run_sync(warm_statements))
+        await _step("openapi", lambda: anyio.to_thread.run_sync(app.openapi))
+        await _step("bcrypt", lambda: anyio.to_thread.run_sync(warm_bcrypt))
+        await _step("routes", lambda: warm_routes(app))
+        logger.info(
+            "Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000,
+            extra={"warmup_ms": state.timings_ms}
+        )
+    state.ready = True
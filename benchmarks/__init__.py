@@ -0,0 +1 @@
+"""Benchmarks and performance tooling for the Event Manager API"""
@@ -0,0 +1,275 @@
+"""
+Synthetic dataset generator for scale testing.
+
+Bulk-loads colleges, users, students, events and registrations with COPY.
+Event popularity follows a Zipf distribution (a few hot events, a long tail),
+the most popular events are sold out, and every user shares one precomputed
+bcrypt hash so loading skips per-row hashing. Rows are appended with explicit
+IDs under a run prefix, then sequences, trending buckets and the stats views
+are brought up to date.
+
+    python -m benchmarks.datagen                                # 1M users, 50k events, 10M registrations
+    python -m benchmarks.datagen --scale 0.01                   # 1% of that
+    python -m benchmarks.datagen --users 5000 --events 200 --registrations 50000 --zipf 1.3
+
+Generated users log in with --password (default "bench-password"). Events
+are spread over their own venues in non-overlapping slots, so the venue
+exclusion constraint is never hit.
+"""
+import argparse
+import bisect
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+
+from app.config import settings
+from app.database import engine
+from app.models import User
+
+BRANCHES = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT", "CHEM", "BIOTECH"]
+CITIES = ["Mumbai", "Pune", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Ahmedabad"]
+EVENT_KINDS = ["Workshop", "Hackathon", "Seminar", "Meetup", "Conference", "Fest", "Talk", "Bootcamp"]
+
+COPY_CHUNK_ROWS = 500_000
+VENUE_SLOT = timedelta(hours=3)
+EVENT_DURATION = timedelta(hours=2)
+
+
+def copy_rows(cursor, table: str, columns: List[str], rows: Iterable[tuple]) -> int:
+    """
+    COPY rows into a table in chunks; None becomes NULL. Values must not
+    contain tabs, newlines or backslashes.
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    buffer = io.StringIO()
+    pending = total = 0
+    for row in rows:
+        buffer.write("\t".join("\\N" if value is None else str(value) for value in row))
+        buffer.write("\n")
+        pending += 1
+        if pending == COPY_CHUNK_ROWS:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            total += pending
+            buffer, pending = io.StringIO(), 0
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        total += pending
+    return total
+
+
+def next_id(cursor, table: str) -> int:
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def sync_sequence(cursor, table: str) -> None:
+    cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+
+
+def zipf_counts(items: int, total: int, exponent: float, cap: int, rng: random.Random) -> List[int]:
+    """
+    Registrations per item for a Zipf popularity ranking shuffled over the
+    items, capped at `cap` (a user registers for an event at most once)
+    """
+    weights = [1.0 / (rank ** exponent) for rank in range(1, items + 1)]
+    scale = total / sum(weights)
+    counts = [min(cap, round(weight * scale)) for weight in weights]
+    rng.shuffle(counts)
+    return counts
+
+
+def password_hash(password: str) -> str:
+    user = User()
+    user.set_password(password)
+    return user.password_hash
+
+
+def timed(label: str, load: Callable[[], int]) -> None:
+    started = time.perf_counter()
+    rows = load()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<16}{rows:>12,} rows {elapsed:>8.1f}s {rows / elapsed if elapsed else 0:>12,.0f} rows/s")
+
+
+def generate(args) -> None:
+    rng = random.Random(args.seed)
+    prefix = args.prefix or f"gen{int(time.time())}"
+    now = datetime.utcnow().replace(microsecond=0)
+    hashed = password_hash(args.password)
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # Loading outlasts the API's timeouts, and rows are generated between COPY chunks
+        cursor.execute("SET statement_timeout = 0")
+        cursor.execute("SET idle_in_transaction_session_timeout = 0")
+        cursor.execute("SELECT id FROM users WHERE is_admin ORDER BY id LIMIT 1")
+        admin = cursor.fetchone()
+        if admin is None:
+            raise SystemExit("Generator needs an admin user to own the events; run the migrations first")
+        creator_id = admin[0]
+
+        college_start = next_id(cursor, "colleges")
+        user_start = next_id(cursor, "users")
+        student_start = next_id(cursor, "students")
+        event_start = next_id(cursor, "events")
+        registration_start = next_id(cursor, "registrations")
+
+        def colleges():
+            for n in range(args.colleges):
+                yield (
+                    college_start + n, f"{prefix} College {n}", f"{prefix}-{n}", rng.choice(CITIES),
+                    f"contact{n}@{prefix}.example.edu", True, now, now
+                )
+
+        def users():
+            for n in range(args.users):
+                yield (
+                    user_start + n, f"{prefix}_user_{n}", f"user{n}@{prefix}.example.com",
+                    f"First{n}", f"Last{n}", hashed, False, True, now
+                )
+
+        # College sizes are skewed too
+        college_weights = [1.0 / (rank ** args.zipf) for rank in range(1, args.colleges + 1)]
+        college_cumulative = []
+        running = 0.0
+        for weight in college_weights:
+            running += weight
+            college_cumulative.append(running)
+
+        def students():
+            student_count = int(args.users * args.student_ratio)
+            for n in range(student_count):
+                college = bisect.bisect_left(college_cumulative, rng.random() * running)
+                yield (
+                    student_start + n, user_start + n, college_start + college, f"{prefix}R{n}",
+                    rng.choice(BRANCHES), rng.randint(1, 4), rng.random() < 0.7, now, now
+                )
+
+        counts = zipf_counts(args.events, args.registrations, args.zipf, args.users, rng)
+        # The hottest events fill up exactly; most others keep spare seats
+        sold_out = sorted(counts, reverse=True)[max(0, int(args.events * args.sold_out_ratio) - 1)] if args.events else 0
+        venues = max(1, args.events // 200)
+        # Half the events are in the past, half upcoming
+        first_slot = now - VENUE_SLOT * (args.events // venues // 2)
+
+        def capacity(count: int) -> Optional[int]:
+            if count and count >= sold_out:
+                return count
+            if rng.random() < 0.2:
+                return None
+            return max(10, count + rng.randint(0, count + 10))
+
+        def event_start_time(n: int) -> datetime:
+            return first_slot + VENUE_SLOT * (n // venues)
+
+        def events():
+            for n, count in enumerate(counts):
+                start = event_start_time(n)
+                yield (
+                    event_start + n, f"{rng.choice(EVENT_KINDS)} {prefix} {n}", None,
+                    f"{prefix} Hall {n % venues}", start, start + EVENT_DURATION, capacity(count),
+                    creator_id, start - timedelta(days=45), start - timedelta(days=45)
+                )
+
+        def registrations():
+            registration_id = registration_start
+            for n, count in enumerate(counts):
+                start = event_start_time(n)
+                # Sign-ups happen in the 30 days before the event, never in the future
+                closes = min(start, now)
+                for user_offset in rng.sample(range(args.users), count):
+                    registered_at = closes - timedelta(seconds=rng.randrange(30 * 24 * 3600))
+                    yield registration_id, user_start + user_offset, event_start + n, registered_at
+                    registration_id += 1
+
+        timed("colleges", lambda: copy_rows(cursor, "colleges", [
+            "id", "name", "code", "city", "contact_email", "is_active", "created_at", "updated_at"
+        ], colleges()))
+        timed("users", lambda: copy_rows(cursor, "users", [
+            "id", "username", "email", "first_name", "last_name", "password_hash", "is_admin", "is_active", "created_at"
+        ], users()))
+        timed("students", lambda: copy_rows(cursor, "students", [
+            "id", "user_id", "college_id", "roll_number", "branch", "year_of_study", "is_verified", "created_at", "updated_at"
+        ], students()))
+        timed("events", lambda: copy_rows(cursor, "events", [
+            "id", "title", "description", "venue", "start_time", "end_time", "capacity",
+            "created_by", "created_at", "updated_at"
+        ], events()))
+        connection.commit()
+
+        # Per-row availability notifications would flood the queue. As superuser,
+        # replica mode also skips the foreign key checks (the generated IDs are
+        # valid by construction); otherwise only the notify trigger is disabled.
+        # Both are transaction-scoped, so no other writer misses its triggers.
+        cursor.execute("SELECT rolsuper FROM pg_roles WHERE rolname = current_user")
+        superuser = cursor.fetchone()[0]
+        if superuser:
+            cursor.execute("SET LOCAL session_replication_role = replica")
+        else:
+            cursor.execute("ALTER TABLE registrations DISABLE TRIGGER registrations_notify_availability")
+        timed("registrations", lambda: copy_rows(cursor, "registrations", [
+            "id", "user_id", "event_id", "registered_at"
+        ], registrations()))
+        if not superuser:
+            cursor.execute("ALTER TABLE registrations ENABLE TRIGGER registrations_notify_availability")
+
+        for table in ("colleges", "users", "students", "events", "registrations"):
+            sync_sequence(cursor, table)
+
+        # Seed the trending window from the generated sign-ups
+        cursor.execute("""
+            INSERT INTO event_registration_buckets (event_id, bucket_start, registrations)
+            SELECT event_id, date_trunc('hour', registered_at), COUNT(*)
+            FROM registrations
+            WHERE id >= %s AND registered_at >= %s
+            GROUP BY 1, 2
+            ON CONFLICT (event_id, bucket_start)
+            DO UPDATE SET registrations = event_registration_buckets.registrations + EXCLUDED.registrations
+        """, (registration_start, now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)))
+        connection.commit()
+
+        started = time.perf_counter()
+        connection.set_session(autocommit=True)
+        for table in ("colleges", "users", "students", "events", "registrations", "event_registration_buckets"):
+            cursor.execute(f"ANALYZE {table}")
+        print(f"{'analyze':<16}{'':>17} {time.perf_counter() - started:>8.1f}s")
+        cursor.execute("RESET statement_timeout")
+        cursor.execute("RESET idle_in_transaction_session_timeout")
+    finally:
+        connection.close()
+
+    from app.routers.stats import refresh_stats
+    started = time.perf_counter()
+    refresh_stats()
+    print(f"{'stats views':<16}{'':>17} {time.perf_counter() - started:>8.1f}s")
+    print(f"\nRun prefix: {prefix} (users log in as {prefix}_user_<n> / {args.password})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every row count below")
+    parser.add_argument("--colleges", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--student-ratio", type=float, default=0.8, help="share of users with a student profile")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--registrations", type=int, default=10_000_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew exponent; higher means hotter hot events")
+    parser.add_argument("--sold-out-ratio", type=float, default=0.01, help="share of the most popular events filled to capacity")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--prefix", help="username and code prefix (default: gen<timestamp>)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for name in ("colleges", "users", "events", "registrations"):
+        setattr(args, name, max(1, int(getattr(args, name) * args.scale)))
+
+    generate(args)
+
+
+if __name__ == "__main__":
+    main()
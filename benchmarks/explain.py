@@ -0,0 +1,274 @@
+"""
+EXPLAIN plan checks for the hot read paths.
+
+Sends one request per hot route to the in-process app and records every
+SELECT it issues, labelled with the router or dependency function that ran
+it (list_events, get_current_user, login, ...). Each statement is then
+EXPLAINed with its actual parameters and checked:
+
+- no sequential scan on a table with at least --min-rows rows
+- the function's statements use one of the indexes listed in EXPECTED_INDEXES
+
+Plan shapes (node types, tables and indexes, without costs) are compared to a
+stored baseline and printed as a unified diff when they change, so a plan
+flip is visible even if it still passes the checks. Run it against a seeded
+database (see benchmarks/datagen.py); on small tables the planner rightly
+prefers sequential scans.
+
+    python -m benchmarks.explain --update-baseline
+    python -m benchmarks.explain                      # exits 1 on a failed check
+    python -m benchmarks.explain --strict             # ... or on any plan change
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+from sqlalchemy import event
+
+from app.database import engine
+from app.dependencies import create_access_token
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "plans.json"
+
+# Function -> indexes of which at least one must appear in its plans
+EXPECTED_INDEXES: Dict[str, Tuple[str, ...]] = {
+    "get_current_user": ("users_pkey", "ix_users_id"),
+    "login": ("ix_users_username",),
+    "list_events": ("ix_events_start_time",),
+    "get_event": ("events_pkey", "ix_events_id"),
+    "list_event_changes": ("ix_events_sync_version_id",),
+    "get_event_registrations": ("ix_registrations_event_id",),
+    "get_my_registrations": ("ix_registrations_user_id_event_id",),
+    "get_registration_ticket": ("ix_registrations_user_id_event_id",),
+    "get_waitlist_position": ("uq_waitlist_entries_user_id_event_id",),
+    "list_users": ("users_pkey", "ix_users_id"),
+    "get_event_fill_history": ("ix_mv_event_daily_fill_event_id_day",),
+}
+
+# Frames below these modules are attributed to the caller
+_LABEL_MODULES = ("app.routers.", "app.dependencies")
+
+
+class StatementRecorder:
+    """
+    Collects (function, SQL) for SELECTs issued while enabled
+    """
+
+    def __init__(self):
+        self.statements: List[Tuple[str, str]] = []
+        self.enabled = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.enabled or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        self.statements.append((self._caller(), cursor.mogrify(statement, parameters).decode()))
+
+    @staticmethod
+    def _caller() -> str:
+        frame = sys._getframe(1)
+        while frame is not None:
+            if frame.f_globals.get("__name__", "").startswith(_LABEL_MODULES):
+                return frame.f_code.co_name
+            frame = frame.f_back
+        return "unknown"
+
+
+def pick_fixture(cursor) -> Dict[str, int]:
+    """
+    A median-popularity event and one of its registrants, so plans reflect
+    typical rather than hottest or empty rows
+    """
+    cursor.execute("SELECT id FROM users WHERE is_admin ORDER BY id LIMIT 1")
+    admin_id = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT event_id FROM (
+            SELECT event_id, COUNT(*) AS registrations FROM registrations GROUP BY event_id
+        ) counts
+        ORDER BY registrations
+        OFFSET (SELECT COUNT(DISTINCT event_id) / 2 FROM registrations)
+        LIMIT 1
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        raise SystemExit("No registrations found; seed the database first (python -m benchmarks.datagen)")
+    event_id = row[0]
+    cursor.execute("SELECT user_id FROM registrations WHERE event_id = %s ORDER BY id LIMIT 1", (event_id,))
+    user_id = cursor.fetchone()[0]
+    cursor.execute("SELECT username FROM users WHERE id = %s", (user_id,))
+    return {"admin_id": admin_id, "event_id": event_id, "user_id": user_id, "username": cursor.fetchone()[0]}
+
+
+def cases(fixture: Dict) -> List[Tuple[str, str, str, Dict]]:
+    """
+    (method, path, caller role, request kwargs) for each hot route
+    """
+    event_id = fixture["event_id"]
+    return [
+        ("POST", "/api/auth/login", "anonymous", {"data": {"username": fixture["username"], "password": "x"}}),
+        ("GET", "/api/auth/me", "user", {}),
+        ("GET", "/api/events?skip=0&limit=100", "user", {}),
+        ("GET", "/api/events?skip=5000&limit=100", "user", {}),
+        ("GET", f"/api/events/{event_id}", "user", {}),
+        ("GET", "/api/events/changes?limit=500", "user", {}),
+        ("GET", "/api/registrations/my-registrations", "user", {}),
+        ("GET", f"/api/registrations/events/{event_id}/ticket", "user", {}),
+        ("GET", f"/api/registrations/events/{event_id}/waitlist", "user", {}),
+        ("GET", f"/api/registrations/events/{event_id}/registrations", "admin", {}),
+        ("GET", "/api/users?limit=100", "admin", {}),
+        ("GET", "/api/colleges", "user", {}),
+        ("GET", "/api/series", "user", {}),
+        ("GET", "/api/stats/events?limit=100", "admin", {}),
+        ("GET", f"/api/stats/events/{event_id}/fill", "admin", {}),
+    ]
+
+
+async def capture(fixture: Dict, recorder: StatementRecorder) -> Dict[str, List[str]]:
+    """
+    Distinct statements per issuing function across all cases
+    """
+    from app.main import app
+
+    headers = {
+        "anonymous": {},
+        "user": {"Authorization": f"Bearer {create_access_token({'sub': str(fixture['user_id']), 'is_admin': False})}"},
+        "admin": {"Authorization": f"Bearer {create_access_token({'sub': str(fixture['admin_id']), 'is_admin': True})}"},
+    }
+    by_function: Dict[str, List[str]] = defaultdict(list)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://explain") as client:
+        for method, path, role, kwargs in cases(fixture):
+            recorder.statements.clear()
+            recorder.enabled = True
+            response = await client.request(method, path, headers=headers[role], **kwargs)
+            recorder.enabled = False
+            print(f"{response.status_code} {method} {path}")
+            for function, sql in recorder.statements:
+                if sql not in by_function[function]:
+                    by_function[function].append(sql)
+    return by_function
+
+
+def plan_nodes(node: Dict, depth: int = 0):
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child, depth + 1)
+
+
+def plan_shape(plan: Dict) -> List[str]:
+    lines = []
+    for depth, node in plan_nodes(plan):
+        line = node["Node Type"]
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+        if "Relation Name" in node:
+            line += f" on {node['Relation Name']}"
+        if node.get("Parent Relationship") in ("SubPlan", "InitPlan"):
+            line = f"{node['Parent Relationship']}: {line}"
+        lines.append("  " * depth + line)
+    return lines
+
+
+def large_tables(cursor, min_rows: int) -> Dict[str, int]:
+    cursor.execute("""
+        SELECT relname, reltuples::bigint FROM pg_class
+        WHERE relkind IN ('r', 'm') AND relnamespace = 'public'::regnamespace AND reltuples >= %s
+    """, (min_rows,))
+    return dict(cursor.fetchall())
+
+
+def check(by_function: Dict[str, List[str]], cursor, min_rows: int) -> Tuple[Dict[str, List[List[str]]], List[str]]:
+    """
+    Plan shapes per function and the failed checks
+    """
+    large = large_tables(cursor, min_rows)
+    shapes: Dict[str, List[List[str]]] = {}
+    failures = []
+
+    for function in sorted(by_function):
+        shapes[function] = []
+        used_indexes = set()
+        for sql in by_function[function]:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql)
+            plan = cursor.fetchone()[0][0]["Plan"]
+            shapes[function].append(plan_shape(plan))
+            for _, node in plan_nodes(plan):
+                used_indexes.add(node.get("Index Name"))
+                relation = node.get("Relation Name")
+                if node["Node Type"] == "Seq Scan" and relation in large:
+                    failures.append(f"{function}: sequential scan on {relation} ({large[relation]:,} rows)\n    {sql}")
+
+        expected = EXPECTED_INDEXES.get(function)
+        if expected and not used_indexes.intersection(expected):
+            failures.append(f"{function}: expected one of {', '.join(expected)} in its plans")
+
+    for function in EXPECTED_INDEXES:
+        if function not in by_function:
+            failures.append(f"{function}: issued no statements; is its case still reachable?")
+    return shapes, failures
+
+
+def diff_shapes(baseline: Dict[str, List[List[str]]], shapes: Dict[str, List[List[str]]]) -> List[str]:
+    changed = []
+    for function in sorted(set(baseline) | set(shapes)):
+        before = ["\n".join(shape) for shape in baseline.get(function, [])]
+        after = ["\n".join(shape) for shape in shapes.get(function, [])]
+        if before != after:
+            changed.extend(difflib.unified_diff(
+                "\n\n".join(before).splitlines(), "\n\n".join(after).splitlines(),
+                f"baseline/{function}", f"current/{function}", lineterm=""
+            ))
+    return changed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rows", type=int, default=10_000, help="tables this large must not be scanned sequentially")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store the current plan shapes as the baseline")
+    parser.add_argument("--strict", action="store_true", help="also fail when a plan shape differs from the baseline")
+    args = parser.parse_args()
+
+    recorder = StatementRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        fixture = pick_fixture(cursor)
+        # Don't sit idle in a transaction while the requests run
+        connection.commit()
+        by_function = asyncio.run(capture(fixture, recorder))
+        shapes, failures = check(by_function, cursor, args.min_rows)
+    finally:
+        connection.close()
+
+    print()
+    for function, function_shapes in shapes.items():
+        print(f"{function}:")
+        for shape in function_shapes:
+            print("\n".join("    " + line for line in shape))
+
+    changed = []
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(shapes, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+    elif args.baseline.exists():
+        changed = diff_shapes(json.loads(args.baseline.read_text()), shapes)
+        if changed:
+            print("\nPlan changes:\n" + "\n".join(changed))
+
+    if failures:
+        print("\nFailed checks:\n  " + "\n  ".join(failures))
+    if failures or (args.strict and changed):
+        raise SystemExit(1)
+    print("\nAll plan checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+HTTP load scenarios with latency percentiles and baseline comparison.
+
+Drives the app in-process through httpx's ASGI transport, or a running server
+with --base-url. Setup creates its own users and events through the API
+(tagged with a run prefix), then each scenario fires its requests with the
+configured concurrency and records per-request latency.
+
+    python -m benchmarks.load                                   # all scenarios, in-process
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --scenario flash_crowd
+    python -m benchmarks.load --output results.json --baseline benchmarks/baselines/load.json
+    python -m benchmarks.load --update-baseline                 # store this run as the baseline
+
+With --baseline the run exits non-zero if any scenario's p95 latency rose or
+its throughput fell by more than --tolerance (default 20%). Scenarios that
+check the API's behaviour (launch) also exit non-zero on a failed check.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "load.json"
+BENCH_PASSWORD = "bench-password"
+SETUP_RETRIES = 30
+SETUP_CONCURRENCY = 4
+
+
+def make_client(base_url: Optional[str], timeout: float = 30.0) -> httpx.AsyncClient:
+    """
+    Client for a running server, or for the app in this process
+    """
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits)
+
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    duration_s: float = 0.0
+    failures: List[str] = field(default_factory=list)
+
+    def check(self, condition: bool, message: str) -> None:
+        if not condition and message not in self.failures:
+            self.failures.append(message)
+
+    def summary(self) -> Dict:
+        latencies = sorted(self.latencies_ms)
+        errors = sum(count for code, count in self.statuses.items() if code == "error" or str(code).startswith("5"))
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items(), key=str)},
+            "duration_s": round(self.duration_s, 3),
+            "throughput_rps": round(len(latencies) / self.duration_s, 1) if self.duration_s else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "failures": self.failures,
+        }
+
+
+class Fixture:
+    """
+    Users, tokens and events created for one benchmark run
+    """
+
+    def __init__(self, client: httpx.AsyncClient, prefix: str, admin_username: str, admin_password: str):
+        self.client = client
+        self.prefix = prefix
+        self.admin_username = admin_username
+        self.admin_password = admin_password
+        self.admin_headers: Dict[str, str] = {}
+        self.usernames: List[str] = []
+        self.user_headers: List[Dict[str, str]] = []
+        self.event_ids: List[int] = []
+        self.page_depth = 1000
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Setup request that waits out load shedding and admission queueing
+        """
+        for _ in range(SETUP_RETRIES):
+            response = await self.client.request(method, url, **kwargs)
+            if response.status_code not in (429, 503):
+                break
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+        response.raise_for_status()
+        return response
+
+    async def login(self, username: str, password: str) -> Dict[str, str]:
+        response = await self.request("POST", "/api/auth/login", data={"username": username, "password": password})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def create_event(self, title: str, capacity: Optional[int] = None) -> int:
+        response = await self.request("POST", "/api/events", headers=self.admin_headers, json={
+            "title": title,
+            "start_time": "2035-01-01T10:00:00",
+            "capacity": capacity,
+        })
+        return int(response.json()["detail"].split(":")[1])
+
+    async def setup(self, users: int, events: int) -> None:
+        self.admin_headers = await self.login(self.admin_username, self.admin_password)
+        semaphore = asyncio.Semaphore(SETUP_CONCURRENCY)
+
+        async def create_user(index: int) -> None:
+            username = f"{self.prefix}_user_{index}"
+            async with semaphore:
+                response = await self.request("POST", "/api/users", json={"username": username, "password": BENCH_PASSWORD})
+                user_id = response.json()["id"]
+                await self.request("PATCH", f"/api/users/{user_id}/activate", headers=self.admin_headers)
+                headers = await self.login(username, BENCH_PASSWORD)
+            self.usernames.append(username)
+            self.user_headers.append(headers)
+
+        async def create_event(index: int) -> None:
+            async with semaphore:
+                self.event_ids.append(await self.create_event(f"{self.prefix} event {index}"))
+
+        await asyncio.gather(*(create_user(index) for index in range(users)))
+        await asyncio.gather(*(create_event(index) for index in range(events)))
+
+        # Spread a few registrations so reads return data
+        for headers in self.user_headers:
+            for event_id in random.sample(self.event_ids, min(5, len(self.event_ids))):
+                await self.request("POST", f"/api/registrations/events/{event_id}/register", headers=headers)
+
+
+RequestFactory = Callable[[int], Awaitable[httpx.Response]]
+
+
+async def run_requests(name: str, count: int, concurrency: int, send: RequestFactory) -> ScenarioResult:
+    """
+    Issue `count` requests with at most `concurrency` in flight
+    """
+    result = ScenarioResult(name)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await send(index)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+            result.latencies_ms.append((time.perf_counter() - started) * 1000)
+            result.statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(count)))
+    result.duration_s = time.perf_counter() - started
+    return result
+
+
+async def login_storm(fixture: Fixture, requests: int, concurrency: int) -> ScenarioResult:
+    client = fixture.client
+
+    def send(index: int):
+        username = fixture.usernames[index % len(fixture.usernames)]
+        return client.post("/api/auth/login", data={"username": username, "password": BENCH_PASSWORD})
+
+    return await run_requests("login_storm", requests, concurrency, send)
+
+
+async def flash_crowd(fixture: Fixture, requests: int, concurrency: int) -> ScenarioResult:
+    # Every user hits one small event at once; 202 (waitlist) and 429 (admission queue) are expected
+    event_id = await fixture.create_event(f"{fixture.prefix} flash crowd", capacity=max(1, len(fixture.user_headers) // 4))
+    client = fixture.client
+
+    def send(index: int):
+        headers = fixture.user_headers[index % len(fixture.user_headers)]
+        return client.post(f"/api/registrations/events/{event_id}/register", headers=headers)
+
+    return await run_requests("flash_crowd", min(requests, len(fixture.user_headers)), concurrency, send)
+
+
+async def launch(fixture: Fixture, requests: int, concurrency: int) -> ScenarioResult:
+    """
+    Every user registers for one new event at once and follows the admission
+    queue, retrying with its X-Admission-Ticket until it is registered or
+    waitlisted. Latency is each user's time to get in. Checks that 429s
+    carry a signed ticket and a queue position, that a presented ticket
+    keeps its place, and that the event ends up with exactly its capacity.
+    """
+    users = fixture.user_headers[:requests]
+    capacity = max(1, len(users) // 2)
+    event_id = await fixture.create_event(f"{fixture.prefix} launch", capacity=capacity)
+    client = fixture.client
+    result = ScenarioResult("launch")
+    url = f"/api/registrations/events/{event_id}/register"
+
+    async def register(index: int) -> httpx.Response:
+        headers = dict(users[index])
+        for _ in range(SETUP_RETRIES):
+            response = await client.post(url, headers=headers)
+            if response.status_code != 429:
+                return response
+            result.statuses["queued"] += 1
+            ticket = response.headers.get("X-Admission-Ticket")
+            detail = response.json().get("detail", {})
+            result.check(ticket is not None, "429 without an X-Admission-Ticket header")
+            result.check(detail.get("ticket") == ticket, "429 body ticket differs from the header")
+            result.check(isinstance(detail.get("position"), int) and detail["position"] >= 1, "429 without a queue position")
+            result.check(
+                headers.get("X-Admission-Ticket") in (None, ticket),
+                "retrying with a ticket issued a different ticket"
+            )
+            headers["X-Admission-Ticket"] = ticket
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+        return response
+
+    # All users at once, whatever --concurrency says, so the gate fills
+    launched = await run_requests("launch", len(users), len(users), register)
+    result.latencies_ms, result.duration_s = launched.latencies_ms, launched.duration_s
+    result.statuses.update(launched.statuses)
+
+    result.check(result.statuses["queued"] > 0, "no request was queued; use more --users than ADMISSION_MAX_IN_FLIGHT")
+    result.check(
+        launched.statuses[201] + launched.statuses[202] == len(users),
+        "not every user got registered or waitlisted through the queue"
+    )
+    registrations = await fixture.request("GET", f"/api/registrations/events/{event_id}/registrations", headers=fixture.admin_headers)
+    result.check(len(registrations.json()) == min(capacity, len(users)), "event registrations differ from its capacity")
+    return result
+
+
+async def deep_paging(fixture: Fixture, requests: int, concurrency: int) -> ScenarioResult:
+    client = fixture.client
+
+    def send(index: int):
+        headers = fixture.user_headers[index % len(fixture.user_headers)]
+        skip = random.randrange(fixture.page_depth)
+        return client.get(f"/api/events?skip={skip}&limit=100", headers=headers)
+
+    return await run_requests("deep_paging", requests, concurrency, send)
+
+
+async def my_registrations(fixture: Fixture, requests: int, concurrency: int) -> ScenarioResult:
+    client = fixture.client
+
+    def send(index: int):
+        headers = fixture.user_headers[index % len(fixture.user_headers)]
+        return client.get("/api/registrations/my-registrations", headers=headers)
+
+    return await run_requests("my_registrations", requests, concurrency, send)
+
+
+async def admin_exports(fixture: Fixture, requests: int, concurrency: int) -> ScenarioResult:
+    client = fixture.client
+    paths = ["/api/users?limit=1000", "/api/stats/events?limit=1000"] + [
+        f"/api/registrations/events/{event_id}/registrations" for event_id in fixture.event_ids[:20]
+    ]
+
+    def send(index: int):
+        return client.get(paths[index % len(paths)], headers=fixture.admin_headers)
+
+    return await run_requests("admin_exports", requests, concurrency, send)
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "flash_crowd": flash_crowd,
+    "launch": launch,
+    "deep_paging": deep_paging,
+    "my_registrations": my_registrations,
+    "admin_exports": admin_exports,
+}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    Regressions against the baseline, one line each
+    """
+    regressions = []
+    print(f"\n{'scenario':<18}{'p95 ms':>10}{'base':>10}{'rps':>10}{'base':>10}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        print(f"{name:<18}{current['p95_ms']:>10.1f}{previous['p95_ms']:>10.1f}"
+              f"{current['throughput_rps']:>10.1f}{previous['throughput_rps']:>10.1f}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+async def run(args) -> Dict[str, Dict]:
+    names = list(SCENARIOS) if args.scenario == "all" else args.scenario.split(",")
+    async with make_client(args.base_url) as client:
+        fixture = Fixture(client, f"bench{int(time.time())}", args.admin_username, args.admin_password)
+        fixture.page_depth = args.page_depth
+        await fixture.setup(args.users, args.events)
+
+        results = {}
+        for name in names:
+            result = await SCENARIOS[name](fixture, args.requests, args.concurrency)
+            results[name] = result.summary()
+            print(f"{name:<18}{json.dumps(results[name])}")
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--scenario", default="all", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--page-depth", type=int, default=1000, help="deepest skip used by deep_paging")
+    parser.add_argument("--admin-username", default="sadmin")
+    parser.add_argument("--admin-password", default="Super@123")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against a stored baseline")
+    parser.add_argument("--update-baseline", action="store_true", help=f"store results as the baseline ({DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    failures = [f"{name}: {failure}" for name, summary in results.items() for failure in summary["failures"]]
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if failures:
+        print("\nFailed checks:\n  " + "\n  ".join(failures))
+        raise SystemExit(1)
+    if args.update_baseline:
+        baseline_path = args.baseline or DEFAULT_BASELINE
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+    elif args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
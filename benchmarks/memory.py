@@ -0,0 +1,225 @@
+"""
+Peak memory per request for the list and export endpoints.
+
+Each endpoint is requested in-process at several result sizes while
+tracemalloc traces the whole process, so the figure covers ORM hydration,
+response validation and JSON encoding in the worker threads as well as the
+response body. Every measurement is taken after a warm-up request and is the
+lowest of --repeat runs, which keeps one-off caches out of the numbers.
+
+An endpoint fails when:
+
+- its peak grows faster than linearly with the row count: the log-log slope
+  between the smallest and largest size exceeds 1 + --tolerance
+- a peak exceeds its budget of BUDGETS[endpoint] = (fixed KiB, KiB per row)
+
+Needs a seeded database with at least max(--sizes) users and events (see
+benchmarks/datagen.py). Registrations for one bench event and one bench user
+are created for the run and removed afterwards.
+
+    python -m benchmarks.memory
+    python -m benchmarks.memory --sizes 500,2000,8000 --output memory.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.database import engine
+from app.dependencies import create_access_token
+
+# Endpoint -> (fixed KiB, KiB per row) allowed at peak, about twice the
+# measured cost so only real regressions trip them
+BUDGETS: Dict[str, Tuple[float, float]] = {
+    "list_events": (512, 5),
+    "list_event_changes": (512, 5),
+    "list_users": (512, 5),
+    "get_event_registrations": (512, 9),
+    "get_my_registrations": (512, 3),
+    "get_event_stats": (512, 3),
+}
+
+
+class Fixture:
+    """
+    A bench event and a bench user whose registration counts are set per size
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.prefix = f"membench{int(time.time())}"
+        self.admin_id: Optional[int] = None
+        self.event_id: Optional[int] = None
+        self.user_id: Optional[int] = None
+
+    def setup(self, largest: int) -> None:
+        cursor = self.cursor
+        cursor.execute("SELECT id FROM users WHERE is_admin ORDER BY id LIMIT 1")
+        self.admin_id = cursor.fetchone()[0]
+        cursor.execute("SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM events)")
+        users, events = cursor.fetchone()
+        if min(users, events) < largest:
+            raise SystemExit(
+                f"Need at least {largest} users and events, found {users} and {events}; "
+                "seed the database first (python -m benchmarks.datagen)"
+            )
+
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, is_admin, is_active, created_at) "
+            "VALUES (%s, '!', false, true, now()) RETURNING id",
+            (f"{self.prefix}_user",)
+        )
+        self.user_id = cursor.fetchone()[0]
+        cursor.execute(
+            "INSERT INTO events (title, start_time, created_by, created_at, updated_at) "
+            "VALUES (%s, now() + interval '1 year', %s, now(), now()) RETURNING id",
+            (f"{self.prefix} event", self.admin_id)
+        )
+        self.event_id = cursor.fetchone()[0]
+        self.connection.commit()
+
+    def resize(self, rows: int) -> None:
+        """
+        Give the bench event `rows` registrants and the bench user `rows` events
+        """
+        cursor = self.cursor
+        cursor.execute(
+            "DELETE FROM registrations WHERE event_id = %s OR user_id = %s", (self.event_id, self.user_id)
+        )
+        cursor.execute("""
+            INSERT INTO registrations (user_id, event_id, registered_at)
+            SELECT id, %s, now() FROM users WHERE id <> %s ORDER BY id LIMIT %s
+        """, (self.event_id, self.user_id, rows))
+        cursor.execute("""
+            INSERT INTO registrations (user_id, event_id, registered_at)
+            SELECT %s, id, now() FROM events WHERE id <> %s ORDER BY id LIMIT %s
+        """, (self.user_id, self.event_id, rows))
+        self.connection.commit()
+
+    def teardown(self) -> None:
+        self.connection.rollback()
+        cursor = self.cursor
+        if self.event_id is not None:
+            cursor.execute(
+                "DELETE FROM registrations WHERE event_id = %s OR user_id = %s", (self.event_id, self.user_id)
+            )
+            cursor.execute("DELETE FROM events WHERE id = %s", (self.event_id,))
+        if self.user_id is not None:
+            cursor.execute("DELETE FROM users WHERE id = %s", (self.user_id,))
+        self.connection.commit()
+
+
+def endpoints(fixture: Fixture) -> Dict[str, Tuple[str, str, Optional[int]]]:
+    """
+    Endpoint -> (path template with {rows}, caller role, largest size it accepts)
+    """
+    return {
+        "list_events": ("/api/events?limit={rows}", "user", None),
+        "list_event_changes": ("/api/events/changes?limit={rows}", "user", 1000),
+        "list_users": ("/api/users?limit={rows}", "admin", None),
+        "get_event_registrations": (f"/api/registrations/events/{fixture.event_id}/registrations", "admin", None),
+        "get_my_registrations": ("/api/registrations/my-registrations", "user", None),
+        "get_event_stats": ("/api/stats/events?limit={rows}", "admin", None),
+    }
+
+
+async def peak_bytes(client: httpx.AsyncClient, path: str, headers: Dict[str, str], repeat: int) -> int:
+    """
+    Lowest peak traced allocation above the starting level over `repeat` requests
+    """
+    response = await client.get(path, headers=headers)
+    response.raise_for_status()
+    del response
+
+    peaks = []
+    for _ in range(repeat):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        response = await client.get(path, headers=headers)
+        _, peak = tracemalloc.get_traced_memory()
+        response.raise_for_status()
+        del response
+        peaks.append(peak - baseline)
+    return min(peaks)
+
+
+async def measure(fixture: Fixture, sizes: List[int], repeat: int) -> Dict[str, Dict[int, int]]:
+    from app.main import app
+
+    headers = {
+        "user": {"Authorization": f"Bearer {create_access_token({'sub': str(fixture.user_id), 'is_admin': False})}"},
+        "admin": {"Authorization": f"Bearer {create_access_token({'sub': str(fixture.admin_id), 'is_admin': True})}"},
+    }
+    results: Dict[str, Dict[int, int]] = {name: {} for name in endpoints(fixture)}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://memory", timeout=120) as client:
+        for rows in sizes:
+            fixture.resize(rows)
+            for name, (template, role, largest) in endpoints(fixture).items():
+                if largest is not None and rows > largest:
+                    continue
+                peak = await peak_bytes(client, template.format(rows=rows), headers[role], repeat)
+                results[name][rows] = peak
+                print(f"{name:<26}{rows:>8} rows {peak / 1024:>10.0f} KiB {peak / rows:>10.0f} B/row")
+    return results
+
+
+def check(results: Dict[str, Dict[int, int]], tolerance: float) -> List[str]:
+    failures = []
+    for name, peaks in results.items():
+        fixed_kib, per_row_kib = BUDGETS[name]
+        for rows, peak in peaks.items():
+            budget = (fixed_kib + per_row_kib * rows) * 1024
+            if peak > budget:
+                failures.append(f"{name}: {peak / 1024:.0f} KiB at {rows} rows exceeds budget of {budget / 1024:.0f} KiB")
+
+        if len(peaks) >= 2:
+            smallest, largest = min(peaks), max(peaks)
+            slope = math.log(peaks[largest] / peaks[smallest]) / math.log(largest / smallest)
+            print(f"{name:<26}growth exponent {slope:.2f}")
+            if slope > 1 + tolerance:
+                failures.append(
+                    f"{name}: peak grows super-linearly (exponent {slope:.2f} from {smallest} to {largest} rows)"
+                )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="250,1000,4000", help="comma-separated result sizes (rows)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed growth exponent above linear")
+    parser.add_argument("--output", type=Path, help="write peaks as JSON")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    connection = engine.raw_connection()
+    fixture = Fixture(connection)
+    try:
+        fixture.setup(sizes[-1])
+        tracemalloc.start()
+        results = asyncio.run(measure(fixture, sizes, args.repeat))
+        tracemalloc.stop()
+    finally:
+        fixture.teardown()
+        connection.close()
+
+    print()
+    failures = check(results, args.tolerance)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if failures:
+        print("\nFailed checks:\n  " + "\n  ".join(failures))
+        raise SystemExit(1)
+    print("\nAll memory checks passed")
+
+
+if __name__ == "__main__":
+    main()
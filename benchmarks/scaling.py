@@ -0,0 +1,133 @@
+"""
+Throughput of the production server as worker processes are added.
+
+For each worker count, starts `python -m app.server` with SERVER_WORKERS set,
+waits until it answers /ready, and runs benchmarks/load.py scenarios against
+it. Reports throughput and p95 per scenario, with the speedup and per-worker
+efficiency relative to the first worker count. Worker counts above the
+number of CPUs available are flagged, since they can only add contention.
+
+DB_CONNECTION_BUDGET, if set, is split across the workers of every run, so
+the database sees the same connection count throughout.
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --workers 1,2,4,8 --scenario deep_paging --requests 2000 --output scaling.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+from benchmarks import load
+
+
+def wait_until_ready(base_url: str, workers: int, timeout: float) -> None:
+    """
+    Wait for /ready; several answers in a row so most workers have warmed up
+    """
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < 2 * workers:
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Server with {workers} workers was not ready within {timeout:.0f}s")
+        try:
+            # A fresh connection each time, so the accepting worker varies
+            ready = httpx.get(f"{base_url}/ready").status_code == 200
+        except httpx.TransportError:
+            ready = False
+        streak = streak + 1 if ready else 0
+        time.sleep(0.05)
+
+
+def measure(workers: int, args) -> Dict[str, Dict]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "SERVER_WORKERS": str(workers),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(args.port),
+        "LOG_ACCESS_ENABLED": "False",
+    }
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_ready(base_url, workers, args.timeout)
+        load_args = argparse.Namespace(
+            base_url=base_url,
+            scenario=args.scenario,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            users=args.users,
+            events=args.events,
+            page_depth=args.page_depth,
+            admin_username=args.admin_username,
+            admin_password=args.admin_password,
+        )
+        return asyncio.run(load.run(load_args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(results: Dict[int, Dict[str, Dict]], cpus: int) -> None:
+    counts = sorted(results)
+    base = counts[0]
+    scenarios = list(results[base])
+    print(f"\n{'scenario':<18}{'workers':>8}{'rps':>10}{'p95 ms':>10}{'speedup':>10}{'efficiency':>12}")
+    for name in scenarios:
+        base_rps = results[base][name]["throughput_rps"]
+        for workers in counts:
+            summary = results[workers][name]
+            speedup = summary["throughput_rps"] / base_rps if base_rps else 0.0
+            efficiency = speedup / (workers / base)
+            flag = "  (more workers than CPUs)" if workers > cpus else ""
+            print(
+                f"{name:<18}{workers:>8}{summary['throughput_rps']:>10.1f}{summary['p95_ms']:>10.1f}"
+                f"{speedup:>9.2f}x{efficiency:>11.0%}{flag}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", help="comma-separated worker counts (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--scenario", default="deep_paging,my_registrations,login_storm")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--page-depth", type=int, default=1000)
+    parser.add_argument("--admin-username", default="sadmin")
+    parser.add_argument("--admin-password", default="Super@123")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for readiness")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    if args.workers:
+        counts = sorted(int(count) for count in args.workers.split(","))
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != cpus:
+            counts.append(cpus)
+
+    results: Dict[int, Dict[str, Dict]] = {}
+    for workers in counts:
+        print(f"\n== {workers} worker{'s' if workers > 1 else ''}")
+        results[workers] = measure(workers, args)
+
+    report(results, cpus)
+    if args.output:
+        args.output.write_text(json.dumps({"cpus": cpus, "results": results}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
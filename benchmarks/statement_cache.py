@@ -0,0 +1,70 @@
+"""
+Microbenchmark for the pre-built hot lookups in app.queries.
+
+Runs each lookup both as a legacy `db.query(...).filter(...).first()` and via
+app.queries against the configured database. Both variants run equivalent SQL
+(the legacy form only adds LIMIT 1), so the difference per call is the Python
+overhead the cached statements save.
+
+    python -m benchmarks.statement_cache --iterations 5000
+"""
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.models import Event, User
+from app import queries
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    # Warm up the compiled cache and the connection first
+    for _ in range(50):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).order_by(User.id).first()
+        event = db.query(Event).order_by(Event.id).first()
+        if user is None or event is None:
+            raise SystemExit("Benchmark needs at least one user and one event in the database")
+        user_id, username, event_id = user.id, user.username, event.id
+
+        cases = [
+            (
+                "user by id",
+                lambda: db.query(User).filter(User.id == user_id).first(),
+                lambda: queries.get_user_by_id(db, user_id),
+            ),
+            (
+                "user by username",
+                lambda: db.query(User).filter(User.username == username).first(),
+                lambda: queries.get_user_by_username(db, username),
+            ),
+            (
+                "event by id",
+                lambda: db.query(Event).filter(Event.id == event_id).first(),
+                lambda: queries.get_event_by_id(db, event_id),
+            ),
+        ]
+
+        print(f"{'lookup':<20}{'legacy us/call':>16}{'cached us/call':>16}{'saved':>10}")
+        for name, legacy, cached in cases:
+            legacy_us = _time_per_call(legacy, args.iterations)
+            cached_us = _time_per_call(cached, args.iterations)
+            print(f"{name:<20}{legacy_us:>16.1f}{cached_us:>16.1f}{legacy_us - cached_us:>10.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+First-request latency of a cold worker versus a warmed-up one.
+
+Each run starts a fresh uvicorn worker twice, once with WARMUP_ENABLED=False
+and once with it on. Once /health answers, the cold worker is timed straight
+away; the warmed worker is timed after /ready turns 200. Every path is then
+requested twice, in order, as the first active admin: the first request
+shows what a user hitting a new worker pays, the second is the steady-state
+reference. Figures are medians over --runs.
+
+The paths default to the WARMUP_PATHS of the current settings plus
+/openapi.json; pass --paths to time routes the warm-up does not touch.
+
+    python -m benchmarks.warmup
+    python -m benchmarks.warmup --runs 5 --paths /api/events?limit=50,/api/users --output warmup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from app.config import settings
+from app.database import engine
+from app.dependencies import create_access_token
+
+
+def admin_token() -> str:
+    with engine.connect() as connection:
+        admin_id = connection.exec_driver_sql(
+            "SELECT id FROM users WHERE is_admin AND is_active ORDER BY id LIMIT 1"
+        ).scalar()
+    if admin_id is None:
+        raise SystemExit("No active admin found; create one first (see README)")
+    return create_access_token({"sub": str(admin_id), "is_admin": True})
+
+
+def wait_for(client: httpx.Client, path: str, timeout: float) -> float:
+    """
+    Seconds until `path` answers 200
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise SystemExit(f"{path} did not answer 200 within {timeout:.0f}s")
+
+
+def measure(warm: bool, port: int, paths: List[str], token: str, timeout: float) -> Dict:
+    env = {**os.environ, "WARMUP_ENABLED": str(warm), "LOG_ACCESS_ENABLED": "False"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        # Readiness polls on a separate connection so they don't warm the timed one
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as probe:
+            started = wait_for(probe, "/health", timeout)
+            ready = started + (wait_for(probe, "/ready", timeout) if warm else 0.0)
+
+        result = {"startup_s": round(started, 3), "ready_s": round(ready, 3), "first_ms": {}, "steady_ms": {}}
+        headers = {"Authorization": f"Bearer {token}"}
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", headers=headers, timeout=timeout) as client:
+            for path in paths:
+                for key in ("first_ms", "steady_ms"):
+                    request_started = time.perf_counter()
+                    response = client.get(path)
+                    result[key][path] = round((time.perf_counter() - request_started) * 1000, 1)
+                    if response.status_code >= 400:
+                        print(f"  {path} returned {response.status_code}")
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(runs: List[Dict], paths: List[str]) -> Dict:
+    return {
+        "ready_s": statistics.median(run["ready_s"] for run in runs),
+        "first_ms": {path: statistics.median(run["first_ms"][path] for run in runs) for path in paths},
+        "steady_ms": {path: statistics.median(run["steady_ms"][path] for run in runs) for path in paths},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--paths", help="comma-separated paths including API_V1_PREFIX")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.paths:
+        paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    else:
+        paths = [settings.API_V1_PREFIX + path for path in settings.warmup_paths] + ["/openapi.json"]
+    token = admin_token()
+
+    runs: Dict[str, List[Dict]] = {"cold": [], "warm": []}
+    for run in range(args.runs):
+        for mode in runs:
+            print(f"run {run + 1}/{args.runs}: {mode}")
+            runs[mode].append(measure(mode == "warm", args.port, paths, token, args.timeout))
+
+    cold, warm = summarize(runs["cold"], paths), summarize(runs["warm"], paths)
+    print(f"\n{'path':<44}{'cold first':>12}{'warm first':>12}{'steady':>10}")
+    for path in paths:
+        print(f"{path:<44}{cold['first_ms'][path]:>10.1f}ms{warm['first_ms'][path]:>10.1f}ms{warm['steady_ms'][path]:>8.1f}ms")
+    total_cold, total_warm = sum(cold["first_ms"].values()), sum(warm["first_ms"].values())
+    print(f"{'all first requests':<44}{total_cold:>10.1f}ms{total_warm:>10.1f}ms")
+    print(f"\nTime to ready: cold {cold['ready_s']:.2f}s, warm {warm['ready_s']:.2f}s")
+
+    if args.output:
+        args.output.write_text(json.dumps({"cold": cold, "warm": warm, "runs": runs}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()